@@ -1,6 +1,5 @@
 import streamlit as st
-#import torch
-from detect import detect
+import torch
 from PIL import Image
 from io import *
 import glob
@@ -8,20 +7,76 @@ from datetime import datetime
 import os
 import wget
 import time
+import cv2
+import numpy as np
+import shutil
+from models.common import DetectMultiBackend
+from utils.augmentations import letterbox
+from utils.general import check_img_size, scale_coords
+from utils.plots import Annotator, colors
+from utils.server import InferenceClient, InferenceServer
+from utils.torch_utils import select_device
 
 ## CFG
 cfg_model_path = "models/yourModel.pt" 
+cfg_imgsz = 640  # inference size (pixels)
+cfg_video_chunk = 16  # video frames per batched inference and progress update
 
 cfg_enable_url_download = True
 if cfg_enable_url_download:
     url = "https://archive.org/download/best_weights/best_weights.pt" #Configure this if you set cfg_enable_url_download to True
-    cfg_model_path = f"models/{url.split('/')[-1:]}" #config model path from url name
+    cfg_model_path = f"models/{url.split('/')[-1]}" #config model path from url name
 
+cfg_server = os.getenv('YOLOV5_SERVER')  # optional warmed serve.py model, i.e. http://127.0.0.1:8500
 
+# Process-wide cache shared by all sessions and reruns
+cache = getattr(st, 'cache_resource', None) or st.cache(allow_output_mutation=True)
 
 
+# Downlaod Model from url.
+def downloadModel():
+    start_dl = time.time()
+    model_file = wget.download(url, out="models/")
+    finished_dl = time.time()
+    print(f"Model Downloaded, ETA:{finished_dl-start_dl}")
+
+
+@cache
+def loadModel(device='cpu'):
+    # Load, fuse and warm up the model once per device, or connect to a serve.py server if YOLOV5_SERVER is set
+    if cfg_server:
+        return InferenceClient(cfg_server)
+    if cfg_enable_url_download and not os.path.exists(cfg_model_path):
+        downloadModel()
+    model = DetectMultiBackend(cfg_model_path, device=select_device('0' if device == 'cuda' else 'cpu'))
+    return InferenceServer(model, [check_img_size(cfg_imgsz, s=model.stride)] * 2)
+
+
+def annotate(im0, det, names):
+    # Draw det(n,6) = [xyxy, conf, cls] onto a copy of BGR image im0
+    annotator = Annotator(im0.copy(), example=str(names))
+    for *xyxy, conf, cls in det:
+        c = int(cls)
+        annotator.box_label(xyxy, f'{names[c]} {conf:.2f}', color=colors(c, True))
+    return annotator.result()
 
 
+def predictImage(im0, device='cpu'):
+    # Inference on a BGR image array in memory, return the annotated copy
+    model = loadModel(device)
+    return annotate(im0, model.predict(im0), model.names)
+
+
+def predictFrames(ims, device='cpu'):
+    # Batched inference on a chunk of same-size BGR video frames, return det(n,6) numpy per frame in frame pixels
+    model = loadModel(device)
+    im = np.stack([letterbox(x, model.imgsz, stride=model.stride, auto=model.pt)[0] for x in ims])
+    im = np.ascontiguousarray(im.transpose((0, 3, 1, 2))[:, ::-1])  # BHWC to BCHW, BGR to RGB
+    dets = [np.asarray(det) for det in model.infer(im)]
+    for det in dets:
+        det[:, :4] = scale_coords(im.shape[2:], det[:, :4], ims[0].shape).round()
+    return dets
+
 
 def imageInput(device, src):
     
@@ -29,28 +84,16 @@ def imageInput(device, src):
         image_file = st.file_uploader("Upload An Image", type=['png', 'jpeg', 'jpg'])
         col1, col2 = st.columns(2)
         if image_file is not None:
-            img = Image.open(image_file)
+            im0 = cv2.imdecode(np.frombuffer(image_file.getvalue(), np.uint8), cv2.IMREAD_COLOR)  # in memory
             with col1:
-                st.image(img, caption='Uploaded Image', use_column_width='always')
-            ts = datetime.timestamp(datetime.now())
-            imgpath = os.path.join('data/uploads', str(ts)+image_file.name)
-            outputpath = os.path.join('data/outputs', os.path.basename(imgpath))
-            with open(imgpath, mode="wb") as f:
-                f.write(image_file.getbuffer())
+                st.image(im0, caption='Uploaded Image', use_column_width='always', channels='BGR')
 
             #call Model prediction--
-            model.cuda() if device == 'cuda' else model.cpu()
-            pred = model(imgpath)
-            pred.render()  # render bbox in image
-            for im in pred.imgs:
-                im_base64 = Image.fromarray(im)
-                im_base64.save(outputpath)
+            im = predictImage(im0, device)
 
             #--Display predicton
-            
-            img_ = Image.open(outputpath)
             with col2:
-                st.image(img_, caption='Model Prediction(s)', use_column_width='always')
+                st.image(im, caption='Model Prediction(s)', use_column_width='always', channels='BGR')
 
     elif src == 'From test set.': 
         # Image selector slider
@@ -59,21 +102,15 @@ def imageInput(device, src):
         image_file = imgpath[imgsel-1]
         submit = st.button("Predict!")
         col1, col2 = st.columns(2)
+        im0 = cv2.imread(image_file)
         with col1:
-            img = Image.open(image_file)
-            st.image(img, caption='Selected Image', use_column_width='always')
+            st.image(im0, caption='Selected Image', use_column_width='always', channels='BGR')
         with col2:            
             if image_file is not None and submit:
                 #call Model prediction--
-                model = torch.hub.load('ultralytics/yolov5', 'custom', path=cfg_model_path, force_reload=True) 
-                pred = model(image_file)
-                pred.render()  # render bbox in image
-                for im in pred.imgs:
-                    im_base64 = Image.fromarray(im)
-                    im_base64.save(os.path.join('data/outputs', os.path.basename(image_file)))
+                im = predictImage(im0, device)
                 #--Display predicton
-                    img_ = Image.open(os.path.join('data/outputs', os.path.basename(image_file)))
-                    st.image(img_, caption='Model Prediction(s)')
+                st.image(im, caption='Model Prediction(s)', channels='BGR')
 
 
 
@@ -84,19 +121,49 @@ def videoInput(device, src):
 
         ts = datetime.timestamp(datetime.now())
         imgpath = os.path.join('data/uploads', str(ts)+uploaded_video.name)
-        outputpath = os.path.join('data/video_output', os.path.basename(imgpath))
+        outputpath = os.path.join('data/video_output', os.path.splitext(os.path.basename(imgpath))[0] + '.mp4')
+        os.makedirs('data/uploads', exist_ok=True)
+        os.makedirs('data/video_output', exist_ok=True)
 
         with open(imgpath, mode='wb') as f:
-            f.write(uploaded_video.read())  # save video to disk
+            shutil.copyfileobj(uploaded_video, f, 1 << 20)  # save video to disk in 1MB blocks
 
-        st_video = open(imgpath, 'rb')
-        video_bytes = st_video.read()
-        st.video(video_bytes)
+        uploaded_video.seek(0)
+        st.video(uploaded_video)  # preview straight from the upload, no extra copy
         st.write("Uploaded Video")
-        detect(weights=cfg_model_path, source=imgpath, device=0) if device == 'cuda' else detect(weights=cfg_model_path, source=imgpath, device='cpu')
-        st_video2 = open(outputpath, 'rb')
-        video_bytes2 = st_video2.read()
-        st.video(video_bytes2)
+
+        #call Model prediction in chunks of frames, showing progress and the latest annotated frame
+        model = loadModel(device)
+        cap = cv2.VideoCapture(imgpath)
+        n = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        w, h = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        writer = cv2.VideoWriter(outputpath, cv2.VideoWriter_fourcc(*'avc1'), fps, (w, h))  # H.264 plays in browsers
+        if not writer.isOpened():
+            writer = cv2.VideoWriter(outputpath, cv2.VideoWriter_fourcc(*'mp4v'), fps, (w, h))
+        progress, frame = st.progress(0), st.empty()
+        done, t0 = 0, time.time()
+        while True:
+            ims = []
+            while len(ims) < cfg_video_chunk:
+                ok, im0 = cap.read()
+                if not ok:
+                    break
+                ims.append(im0)
+            if not ims:
+                break
+            for im0, det in zip(ims, predictFrames(ims, device)):
+                im = annotate(im0, det, model.names)
+                writer.write(im)
+            done += len(ims)
+            progress.progress(min(done / max(n, 1), 1.0))
+            frame.image(im, caption=f'{done}/{n} frames, {done / (time.time() - t0):.1f} FPS', channels='BGR')
+        cap.release()
+        writer.release()
+        os.remove(imgpath)
+
+        #--Display predicton
+        st.video(outputpath)
         st.write("Model Prediction")
 
 
@@ -128,12 +195,3 @@ if __name__ == '__main__':
   
     main()
 
-# Downlaod Model from url.    
-@st.cache
-def loadModel():
-    start_dl = time.time()
-    model_file = wget.download(url, out="models/")
-    finished_dl = time.time()
-    print(f"Model Downloaded, ETA:{finished_dl-start_dl}")
-    if cfg_enable_url_download:
-        loadModel()
\ No newline at end of file
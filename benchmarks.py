@@ -23,6 +23,7 @@ Requirements:
 
 Usage:
     $ python utils/benchmarks.py --weights yolov5s.pt --img 640
+    $ python benchmarks.py --serialize --batch-size 8  # Detections serialization cost per image
 """
 
 import argparse
@@ -31,7 +32,9 @@ import sys
 import time
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import torch
 
 FILE = Path(__file__).resolve()
 ROOT = FILE.parents[0]  # YOLOv5 root directory
@@ -40,11 +43,12 @@ if str(ROOT) not in sys.path:
 # ROOT = ROOT.relative_to(Path.cwd())  # relative
 
 import export
+from models.common import Detections
 from models.experimental import attempt_load
 from models.yolo import SegmentationModel
 from segment.val import run as val_seg
 from utils import notebook_init
-from utils.general import LOGGER, check_yaml, file_size, print_args
+from utils.general import LOGGER, Profile, check_yaml, file_size, print_args
 from utils.torch_utils import select_device
 from val import run as val_det
 
@@ -59,6 +63,7 @@ def run(
         test=False,  # test exports only
         pt_only=False,  # test PyTorch only
         hard_fail=False,  # throw error on benchmark failure
+        serialize=False,  # benchmark Detections serialization only
 ):
     y, t = [], time.time()
     device = select_device(device)
@@ -121,6 +126,7 @@ def test(
         test=False,  # test exports only
         pt_only=False,  # test PyTorch only
         hard_fail=False,  # throw error on benchmark failure
+        serialize=False,  # benchmark Detections serialization only
 ):
     y, t = [], time.time()
     device = select_device(device)
@@ -143,6 +149,48 @@ def test(
     return py
 
 
+def serialization(
+        weights=ROOT / 'yolov5s.pt',  # unused, synthetic detections
+        imgsz=640,  # image size (pixels)
+        batch_size=1,  # images per Detections object
+        n=30,  # detections per image
+        nc=80,  # number of classes
+        iterations=200,  # timed iterations per method
+        **kwargs,  # ignored run() arguments
+):
+    # Time Detections serialization paths on synthetic results, returns microseconds per image for each method
+    ims = [np.zeros((imgsz, imgsz, 3), dtype=np.uint8) for _ in range(batch_size)]
+    pred = []
+    for _ in range(batch_size):
+        x = torch.rand(n, 6) * imgsz / 2
+        x[:, 2:4] += x[:, :2]  # x2, y2 > x1, y1
+        x[:, 4] = torch.rand(n)  # conf
+        x[:, 5] = torch.randint(0, nc, (n,))  # cls
+        pred.append(x)
+    results = Detections(ims, pred, [f'image{i}.jpg' for i in range(batch_size)], (Profile(),) * 3,
+                         {i: f'class{i}' for i in range(nc)}, (batch_size, 3, imgsz, imgsz))
+
+    methods = {
+        'pandas().xyxy to_json': lambda r: [x.to_json(orient='records') for x in r.pandas().xyxy],
+        'to_json()': lambda r: r.to_json(),
+        'to_records()': lambda r: r.to_records(),
+        'to_numpy()': lambda r: r.to_numpy(),
+        'tolist()': lambda r: r.tolist()}
+    y = []
+    for name, f in methods.items():
+        f(results)  # warmup
+        t = time.perf_counter()
+        for _ in range(iterations):
+            f(results)
+        y.append([name, round((time.perf_counter() - t) / iterations / batch_size * 1E6, 1)])
+
+    # Print results
+    py = pd.DataFrame(y, columns=['Method', 'Time per image (us)'])
+    LOGGER.info(f'\nDetections serialization, batch-size {batch_size}, {n} detections per image')
+    LOGGER.info(str(py))
+    return py
+
+
 def parse_opt():
     parser = argparse.ArgumentParser()
     parser.add_argument('--weights', type=str, default=ROOT / 'yolov5s.pt', help='weights path')
@@ -154,6 +202,7 @@ def parse_opt():
     parser.add_argument('--test', action='store_true', help='test exports only')
     parser.add_argument('--pt-only', action='store_true', help='test PyTorch only')
     parser.add_argument('--hard-fail', nargs='?', const=True, default=False, help='Exception on error or < min metric')
+    parser.add_argument('--serialize', action='store_true', help='benchmark Detections serialization only')
     opt = parser.parse_args()
     opt.data = check_yaml(opt.data)  # check YAML
     print_args(vars(opt))
@@ -161,7 +210,10 @@ def parse_opt():
 
 
 def main(opt):
-    test(**vars(opt)) if opt.test else run(**vars(opt))
+    if opt.serialize:
+        serialization(**vars(opt))
+    else:
+        test(**vars(opt)) if opt.test else run(**vars(opt))
 
 
 if __name__ == "__main__":
@@ -8,6 +8,7 @@ Usage - sources:
                                                      vid.mp4                         # video
                                                      path/                           # directory
                                                      'path/*.jpg'                    # glob
+                                                     path/ --batch-size 16           # batched directory
                                                      'https://youtu.be/Zgi9g1ksQHc'  # YouTube
                                                      'rtsp://example.com/media.mp4'  # RTSP, RTMP, HTTP stream
 
@@ -42,11 +43,16 @@ if str(ROOT) not in sys.path:
 ROOT = Path(os.path.relpath(ROOT, Path.cwd()))  # relative
 
 from models.common import DetectMultiBackend
-from utils.dataloaders import IMG_FORMATS, VID_FORMATS, LoadImages, LoadStreams
-from utils.general import (LOGGER, Profile, check_file, check_img_size, check_imshow, check_requirements, colorstr, cv2,
-                           increment_path, non_max_suppression, print_args, scale_coords, strip_optimizer, xyxy2xywh)
+from utils.cards import CardOverlay, get_cards
+from utils.dataloaders import IMG_FORMATS, VID_FORMATS, LoadImageBatches, LoadImages, LoadStreams, source_files
+from utils.general import (LOGGER, Profile, apply_preset, check_file, check_img_size, check_imshow, check_requirements,
+                           colorstr, cv2, increment_path, non_max_suppression, print_args, scale_coords,
+                           strip_optimizer, xyxy2xywh)
+from utils.motion import MotionGate
 from utils.plots import Annotator, colors, save_one_box
-from utils.torch_utils import select_device, smart_inference_mode
+from utils.server import InferenceClient
+from utils.torch_utils import InputPool, select_device, smart_inference_mode
+from utils.tracker import CardTracker
 
 
 @smart_inference_mode()
@@ -78,6 +84,11 @@ def run(
         half=False,  # use FP16 half-precision inference
         dnn=False,  # use OpenCV DNN for ONNX inference
         vid_stride=1,  # video frame-rate stride
+        track=False,  # track cards across video and stream frames, report confirmed tracks only
+        server=None,  # inference server address from serve.py, i.e. http://127.0.0.1:8500, None to load weights
+        motion_gate=0.0,  # infer only when this fraction of a downscaled frame changed, i.e. 0.002, 0 to disable
+        video_backend='cv2',  # video file decoder, 'cv2', 'pyav' or 'ffmpeg', decoded ahead in a background thread
+        batch_size=1,  # images per forward pass for image directories and globs, loaded by a thread pool
 ):
     source = str(source)
     save_img = not nosave and not source.endswith('.txt')  # save inference images
@@ -93,39 +104,68 @@ def run(
 
     # Load model
     device = select_device(device)
-    model = DetectMultiBackend(weights, device=device, dnn=dnn, data=data, fp16=half)
+    if server:  # warmed model in a persistent serve.py process
+        model = InferenceClient(server)
+    else:
+        model = DetectMultiBackend(weights, device=device, dnn=dnn, data=data, fp16=half)
     stride, names, pt = model.stride, model.names, model.pt
     imgsz = check_img_size(imgsz, s=stride)  # check image size
+    cards = get_cards(names)  # class id to rank/suit lookups
 
     # Dataloader
     if webcam:
         view_img = check_imshow()
         dataset = LoadStreams(source, img_size=imgsz, stride=stride, auto=pt, vid_stride=vid_stride)
         bs = len(dataset)  # batch_size
+    elif batch_size > 1 and (pt or server) and not any(x.split('.')[-1].lower() in VID_FORMATS
+                                                        for x in source_files(source)):
+        dataset = LoadImageBatches(source, img_size=imgsz, stride=stride, auto=pt, batch_size=batch_size)
+        bs = batch_size  # batch_size
     else:
-        dataset = LoadImages(source, img_size=imgsz, stride=stride, auto=pt, vid_stride=vid_stride)
+        if batch_size > 1:
+            LOGGER.warning('WARNING ⚠️ --batch-size needs image-only sources and a PyTorch or --server model, using 1')
+        dataset = LoadImages(source, img_size=imgsz, stride=stride, auto=pt, vid_stride=vid_stride,
+                             backend=video_backend)
         bs = 1  # batch_size
+    batched = webcam or bs > 1  # dataset yields lists of paths and images
     vid_path, vid_writer = [None] * bs, [None] * bs
+    overlays = [CardOverlay(cards) for _ in range(bs)]
+    trackers = [CardTracker(len(names)) for _ in range(bs)] if track else None
+    gate = MotionGate(motion_gate) if motion_gate else None  # reuse detections while the scene is unchanged
 
     # Run inference
-    model.warmup(imgsz=(1 if pt else bs, 3, *imgsz))  # warmup
+    if not server:
+        model.warmup(imgsz=(1 if pt else bs, 3, *imgsz))  # warmup
+        inputs = InputPool(device, model.fp16)  # input tensors reused across frames once released
     seen, windows, dt = 0, [], (Profile(), Profile(), Profile())
     for path, im, im0s, vid_cap, s in dataset:
-        with dt[0]:
-            im = torch.from_numpy(im).to(device)
-            im = im.half() if model.fp16 else im.float()  # uint8 to fp16/32
-            im /= 255  # 0 - 255 to 0.0 - 1.0
-            if len(im.shape) == 3:
-                im = im[None]  # expand for batch dim
-
-        # Inference
-        with dt[1]:
-            visualize = increment_path(save_dir / Path(path).stem, mkdir=True) if visualize else False
-            pred = model(im, augment=augment, visualize=visualize)
-
-        # NMS
-        with dt[2]:
-            pred = non_max_suppression(pred, conf_thres, iou_thres, classes, agnostic_nms, max_det=max_det)
+        run = None  # gate mask, photos are never gated as consecutive files need not show the same scene
+        if gate and (webcam or dataset.mode == 'video'):  # references kept per stream index or video file
+            run = gate.check(im0s if batched else [im0s], dataset.index if webcam else [path])  # changed frames
+            im = im[run] if batched and (pt or server) else im  # fixed batch size backends infer the full batch
+        if run is not None and not run.any():  # scene unchanged, skip inference
+            pred = []
+            im = im[None] if len(im.shape) == 3 else im  # expand for batch dim
+        elif server:  # uint8 images to the server, inference and NMS remote
+            with dt[1]:
+                pred = model.infer(im, conf_thres, iou_thres, classes, agnostic_nms, max_det)
+            im = im[None] if len(im.shape) == 3 else im  # expand for batch dim
+        else:
+            with dt[0]:
+                im = inputs(im)  # uint8 to fp16/32 0.0 - 1.0 (b,3,h,w) in reused buffers
+
+            # Inference
+            with dt[1]:
+                visualize = increment_path(save_dir / Path(path).stem, mkdir=True) if visualize else False
+                pred = model(im, augment=augment, visualize=visualize)
+
+            # NMS
+            with dt[2]:
+                pred = non_max_suppression(pred, conf_thres, iou_thres, classes, agnostic_nms, max_det=max_det)
+            inputs.release(im)  # only its shape is read below
+
+        if run is not None:
+            pred = gate.merge(pred, run)  # last detections for unchanged frames
 
         # Second-stage classifier (optional)
         # pred = utils.general.apply_classifier(pred, classifier_model, im, im0s)
@@ -133,7 +173,7 @@ def run(
         # Process predictions
         for i, det in enumerate(pred):  # per image
             seen += 1
-            if webcam:  # batch_size >= 1
+            if batched:  # batch_size >= 1
                 p, im0, frame = path[i], im0s[i].copy(), dataset.count
                 s += f'{i}: '
             else:
@@ -146,6 +186,8 @@ def run(
             gn = torch.tensor(im0.shape)[[1, 0, 1, 0]]  # normalization gain whwh
             imc = im0.copy() if save_crop else im0  # for save_crop
             annotator = Annotator(im0, line_width=line_thickness, example=str(names))
+            if trackers and dataset.mode != 'image':  # photos are unrelated, tracking would only hide their cards
+                det = trackers[i].update(det)[0]  # confirmed tracks with voted classes
             if len(det):
                 # Rescale boxes from img_size to im0 size
                 det[:, :4] = scale_coords(im.shape[2:], det[:, :4], im0.shape).round()
@@ -177,6 +219,7 @@ def run(
                     windows.append(p)
                     cv2.namedWindow(str(p), cv2.WINDOW_NORMAL | cv2.WINDOW_KEEPRATIO)  # allow window resize (Linux)
                     cv2.resizeWindow(str(p), im0.shape[1], im0.shape[0])
+                overlays[i](im0, det, 0 if dataset.mode == 'image' else None)  # redrawn on hand changes, photos fresh
                 cv2.imshow(str(p), im0)
                 cv2.waitKey(1)  # 1 millisecond
 
@@ -201,101 +244,11 @@ def run(
 
         # Print time (inference-only)
         LOGGER.info(f"{s}{'' if len(det) else '(no detections), '}{dt[1].dt * 1E3:.1f}ms")
-        dic = {  "0": "10C","1": "10D","2": "10H","3": "10S","4": "2C","5": "2D","6": "2H","7": "2S","8": "3C","9": "3D","10": "3H","11": "3S","12": "4C","13": "4D","14": "4H","15": "4S","16": "5C","17": "5D","18": "5H","19": "5S","20": "6C","21": "6D","22": "6H","23": "6S","24": "7C","25": "7D","26": "7H","27": "7S","28": "8C","29": "8D","30": "8H","31": "8S","32": "9C" ,"33": "9D","34": "9H" ,"35": "9S" ,"36": "AC","37": "AD","38": "AH" ,"39": "AS","40": "JC" ,"41": "JD","42": "JH","43": "Joker","44": "JS","45": "KC","46": "KD","47": "KH","48": "KS","49": "QC","50": "QD","51": "QH","52": "QS" ,"53": "backcard" }
-
-        ans = s[10: -1]
-        S, C, D, H = [], [], [], []
-
-        add = 0
-
-        if ans :
-            ans_list = ans.strip().split(',')[:-1]
-            for pred in ans_list:
-                if pred:
-                    if len(pred.split()) == 2 and pred.split()[0] == '3':
-                        add += 1
-                        print("add", add)
-                    elif len(pred.split()) == 2 and pred.split()[0] == '4':
-                        add += 1
-                        print("add", add)
-
-            print("ans_list", ans_list)
-            if ans_list != [' ']:
-                final_list = [item.split()[-1] for item in ans_list]
-                print("Items: ", final_list)
-
-            for item in final_list:
-                #if item[-1] == 's':
-                #    item = item[:-1]
-
-                if len(item) == 3:
-                    num = item[:2]
-                    typ = item[-1]
-
-                else:
-                    num = item[:1]
-                    typ = item[-1]
-
-            
-                if typ.upper() == 'S':
-                    S.append(num)
-                if typ.upper() == 'C':
-                    C.append(num)
-                if typ.upper() == 'D':
-                    D.append(num)
-                if typ.upper() == 'H':
-                    H.append(num)
-
-        #print("S:", S)
-        #print("C:", C)
-        #print("D:", D)
-        #print("H:", H)
-        
-        else:
-            final_list = []
-
-        font = cv2.FONT_HERSHEY_TRIPLEX
-        thick = 3
-        color = (255,255,255)
-        
-        num_of_cards = det.shape[0]
-        cv2.putText(im0,f"No. Cards: {len(final_list) + add}", (50, 30), font, 1, color, thick, cv2.LINE_4)
-
-        if S:
-            cv2.putText(im0, f"Spade: {[i for i in S]}", (50,90),font, 1, color , thick, cv2.LINE_4)
-        cv2.imshow(str(p), im0)
-        
-        if C:
-            cv2.putText(im0, f"Club: {[i for i in C]}", (50,150),font, 1, color, thick, cv2.LINE_4)
-        cv2.imshow(str(p), im0)
-
-        if D:
-            cv2.putText(im0, f"Diamond: {[i for i in D]}", (50,250),font, 1, color, thick, cv2.LINE_4)
-        cv2.imshow(str(p), im0)
-
-        if H:
-            cv2.putText(im0, f"Heart: {[i for i in H]}", (50,350),font, 1, color, thick, cv2.LINE_4)
-        cv2.imshow(str(p), im0)
-
-        from math import atan2, degrees, radians
-
-        def get_angle(point_1, point_2): #These can also be four parameters instead of two arrays
-            angle = atan2(point_1[1] - point_2[1], point_1[0] - point_2[0])
-            
-            #Optional
-            angle = degrees(angle)
-            
-            # OR
-            #angle = radians(angle)
-            
-            return angle
-
-        
-        print(det)
-
-        
+
     # Print results
-    t = tuple(x.t / seen * 1E3 for x in dt)  # speeds per image
+    if gate:
+        LOGGER.info(f'Motion gate: {gate}')
+    t = tuple(x.t / max(seen, 1) * 1E3 for x in dt)  # speeds per image
     LOGGER.info(f'Speed: %.1fms pre-process, %.1fms inference, %.1fms NMS per image at shape {(1, 3, *imgsz)}' % t)
     if save_txt or save_img:
         s = f"\n{len(list(save_dir.glob('labels/*.txt')))} labels saved to {save_dir / 'labels'}" if save_txt else ''
@@ -333,7 +286,13 @@ def parse_opt():
     parser.add_argument('--half', action='store_true', help='use FP16 half-precision inference')
     parser.add_argument('--dnn', action='store_true', help='use OpenCV DNN for ONNX inference')
     parser.add_argument('--vid-stride', type=int, default=1, help='video frame-rate stride')
-    opt = parser.parse_args()
+    parser.add_argument('--track', action='store_true', help='track cards across video and stream frames')
+    parser.add_argument('--server', type=str, help='inference server address from serve.py, i.e. http://127.0.0.1:8500')
+    parser.add_argument('--motion-gate', type=float, default=0.0, help='infer only when this frame fraction changed')
+    parser.add_argument('--video-backend', default='cv2', choices=('cv2', 'pyav', 'ffmpeg'), help='video file decoder')
+    parser.add_argument('--batch-size', type=int, default=1, help='images per forward pass for image directories')
+    parser.add_argument('--preset', type=str, help='named preset, i.e. cards for data/presets/cards.yaml')
+    opt = apply_preset(parser.parse_args(), parser, 'detect')
     opt.imgsz *= 2 if len(opt.imgsz) == 1 else 1  # expand
     print_args(vars(opt))
     return opt
@@ -2,10 +2,11 @@ import argparse
 import os
 import platform
 import sys
-from pathlib import Path
 import time
-import torch
+from pathlib import Path
 
+import numpy as np
+import torch
 
 FILE = Path(__file__).resolve()
 ROOT = FILE.parents[0]  # YOLOv5 root directory
@@ -15,11 +16,16 @@ ROOT = Path(os.path.relpath(ROOT, Path.cwd()))  # relative
 
 from models.common import DetectMultiBackend
 from utils.dataloaders import IMG_FORMATS, VID_FORMATS, LoadImages, LoadStreams
-from utils.general import (LOGGER, Profile, check_file, check_img_size, check_imshow, check_requirements, colorstr, cv2,
-                           increment_path, non_max_suppression, print_args, scale_coords, strip_optimizer, xyxy2xywh)
+from utils.general import (LOGGER, Profile, apply_preset, check_file, check_img_size, check_imshow, check_requirements,
+                           colorstr, cv2, increment_path, non_max_suppression, print_args, scale_coords,
+                           strip_optimizer, xyxy2xywh)
+from utils.motion import MotionGate
+from utils.pipeline import Pipeline
 from utils.plots import Annotator, colors, save_one_box
-from utils.torch_utils import select_device, smart_inference_mode
-
+from utils.recorder import DetRecorder
+from utils.tarneeb import TarneebSeats, TarneebTables, draw_trick
+from utils.torch_utils import InputPool, select_device, smart_inference_mode
+from utils.tracker import CardTracker
 
 
 @smart_inference_mode()
@@ -51,54 +57,22 @@ def run(
         half=False,  # use FP16 half-precision inference
         dnn=False,  # use OpenCV DNN for ONNX inference
         vid_stride=1,  # video frame-rate stride
+        track=False,  # track cards across frames, report confirmed tracks only
+        dwell=2.0,  # seconds a card must stay on the table before it is played
+        dwell_frames=0,  # frames a card must stay on the table before it is played, 0 for wall-clock only
+        trump=None,  # trump suit(s) per stream, i.e. 'H' or ['H', 'S'] or tables.yaml, None to prompt
+        pipeline=False,  # run capture, inference, game logic and rendering in overlapping threads
+        headless=False,  # no annotation, rendering or saved images, only game events
+        events=None,  # game event log, '-' for stdout, 'tcp://host:port' for a socket, None for save_dir/tarneeb.jsonl
+        seats=None,  # seat polygons yaml, assigns cards to players by location and optionally crops inference
+        record=False,  # record per-frame detections to save_dir/detections.trnb for replay_trnb.py
+        motion_gate=0.0,  # infer only when this fraction of a downscaled frame changed, i.e. 0.002, 0 to disable
+        video_backend='cv2',  # video file decoder, 'cv2', 'pyav' or 'ffmpeg', decoded ahead in a background thread
 ):
-
-    # PREPARING TARNEEB
-    order = ['2','3','4','5','6','7','8','9','10','J','Q','K','A']
-    winner = "__"
-    cards_list = set()
-    trnb_set = set()
-    trnb_list = []
-    temp_card = 1
-    ms_sum_1 = 0
-    ms_sum_2 = 0
-    ms_sum_3 = 0
-    ms_sum_4 = 0
-    
-
-    def check_card():
-        temp_card = 1
-        start = time.time()
-        end = time.time()
-        if temp_card:
-            temp_card -=1
-        while((end - start) <= 2 ):
-            end = time.time()
-        if temp_card == card:
-            return True
-        else:
-            return False
-
-    def card_number(elem):
-        return elem[:-1]
-
-    def card_type(elem):
-        return elem[-1]
-
-    def get_index(elem):
-        return order.index(card_number(elem))
-
-    trnb = input("Enter Tarneeb: ").upper()
-
-    unique_cards = set()
-    first, second, third, fourth = '','','',''
-
-    font = cv2.FONT_HERSHEY_TRIPLEX
-    thick = 3
-    color = (255,255,255)
+    font, thick, color = cv2.FONT_HERSHEY_TRIPLEX, 3, (255, 255, 255)
 
     source = str(source)
-    save_img = not nosave and not source.endswith('.txt')  # save inference images
+    save_img = not nosave and not headless and not source.endswith('.txt')  # save inference images
     is_file = Path(source).suffix[1:] in (IMG_FORMATS + VID_FORMATS)
     is_url = source.lower().startswith(('rtsp://', 'rtmp://', 'http://', 'https://'))
     webcam = source.isnumeric() or source.endswith('.txt') or (is_url and not is_file)
@@ -114,59 +88,112 @@ def run(
     model = DetectMultiBackend(weights, device=device, dnn=dnn, data=data, fp16=half)
     stride, names, pt = model.stride, model.names, model.pt
     imgsz = check_img_size(imgsz, s=stride)  # check image size
+    seats = TarneebSeats(seats) if seats else None
+    transforms = seats.transform(imgsz, stride, pt) if seats and seats.crop else None  # crop to play areas
 
     # Dataloader
     if webcam:
-        view_img = check_imshow()
-        dataset = LoadStreams(source, img_size=imgsz, stride=stride, auto=pt, vid_stride=vid_stride)
+        view_img = not headless and check_imshow()
+        dataset = LoadStreams(source, img_size=imgsz, stride=stride, auto=pt, transforms=transforms,
+                              vid_stride=vid_stride, skip=pt)  # batch only tables with a new frame, needs pt dynamic bs
         bs = len(dataset)  # batch_size
     else:
-        dataset = LoadImages(source, img_size=imgsz, stride=stride, auto=pt, vid_stride=vid_stride)
+        dataset = LoadImages(source, img_size=imgsz, stride=stride, auto=pt, transforms=transforms,
+                             vid_stride=vid_stride, backend=video_backend)
         bs = 1  # batch_size
     vid_path, vid_writer = [None] * bs, [None] * bs
+    trackers = [CardTracker(len(names)) for _ in range(bs)] if track else None
+    gate = MotionGate(motion_gate) if motion_gate else None  # reuse detections while a table is unchanged
+
+    # Tarneeb tables, one independent game per stream
+    if trump is None and headless:
+        LOGGER.warning('WARNING ⚠️ --trump not set in --headless mode, using spades')
+        trump = 'S'
+    elif trump is None:
+        trump = [input(f"Enter Tarneeb{f' for table {i}' if bs > 1 else ''}: ") for i in range(bs)]
+    if events is None:
+        events = '-' if headless else save_dir / 'tarneeb.jsonl'
+    tables = TarneebTables(names, trump, n=bs, log=events, conf_thres=conf_thres, dwell=dwell, frames=dwell_frames)
+    recorder = DetRecorder(save_dir / 'detections.trnb', names, trump=[game.trick.trump for game in tables],
+                           tables=bs, conf_thres=conf_thres, dwell=dwell, dwell_frames=dwell_frames,
+                           grace=tables[0].trick.tracker.grace, source=source) if record else None
 
     # Run inference
     model.warmup(imgsz=(1 if pt else bs, 3, *imgsz))  # warmup
+    inputs = InputPool(device, model.fp16)  # input tensors reused once inference or a dropping queue releases them
     seen, windows, dt = 0, [], (Profile(), Profile(), Profile())
-    for path, im, im0s, vid_cap, s in dataset:
-        with dt[0]:
-            im = torch.from_numpy(im).to(device)
-            im = im.half() if model.fp16 else im.float()  # uint8 to fp16/32
-            im /= 255  # 0 - 255 to 0.0 - 1.0
-            if len(im.shape) == 3:
-                im = im[None]  # expand for batch dim
-
-        # Inference
-        with dt[1]:
-            visualize = increment_path(save_dir / Path(path).stem, mkdir=True) if visualize else False
-            pred = model(im, augment=augment, visualize=visualize)
-
-        # NMS
-        with dt[2]:
-            pred = non_max_suppression(pred, conf_thres, iou_thres, classes, agnostic_nms, max_det=max_det)
+
+    def capture():
+        # Dataset batches with frame index, mode and (stream index, capture time) per image read at capture time
+        for batch in dataset:
+            streams = list(zip(dataset.index, dataset.stamps)) if webcam else [(0, None)]
+            yield batch, dataset.count if webcam else getattr(dataset, 'frame', 0), dataset.mode, streams
+
+    @smart_inference_mode()
+    def preprocess(x):
+        (path, im, im0s, vid_cap, s), frame, mode, streams = x
+        gated = None  # gate (mask, keys, frames) carried with the item, so merge() pairs with this check()
+        if gate and (webcam or mode == 'video'):  # photos are never gated, consecutive files need not show one table
+            keys = [i for i, _ in streams] if webcam else [path]  # references kept per stream index or video file
+            gated = gate.check(im0s if webcam else [im0s], keys), keys, gate.pending
+        im = im[None] if len(im.shape) == 3 else im  # expand for batch dim
+        if gated is None or gated[0].any():  # unchanged tables skip preprocessing too, only im.shape is read later
+            with dt[0]:
+                im = im[gated[0]] if gated is not None and pt else im  # changed frames only
+                im = inputs(im)  # uint8 to fp16/32 0.0 - 1.0 (b,3,h,w) in released buffers
+        return path, im, im0s, vid_cap, s, frame, mode, streams, gated
+
+    @smart_inference_mode()
+    def inference(x):
+        path, im, im0s, gated = x[0], x[1], x[2], x[8]
+        pred, ms = [], 'skipped, unchanged'
+        if gated is None or gated[0].any():
+            # Inference
+            with dt[1]:
+                vis = increment_path(save_dir / Path(path).stem, mkdir=True) if visualize else False
+                pred = model(im, augment=augment, visualize=vis)
+            ms = f'{dt[1].dt * 1E3:.1f}ms'
+
+            # NMS
+            with dt[2]:
+                pred = non_max_suppression(pred, conf_thres, iou_thres, classes, agnostic_nms, max_det=max_det)
+            inputs.release(im)  # later stages only read its shape
+        if gated is not None:
+            pred = gate.merge(pred, *gated)  # last detections for unchanged tables
 
         # Second-stage classifier (optional)
         # pred = utils.general.apply_classifier(pred, classifier_model, im, im0s)
-
-        # Process predictions
-        for i, det in enumerate(pred):  # per image
+        return (*x, pred, ms)
+
+    def logic(x):
+        # Process predictions, returns per-image results with a snapshot of each game for rendering
+        nonlocal seen
+        path, im, im0s, vid_cap, s, frame, mode, streams, gated, pred, ms = x
+        results = []
+        for j, det in enumerate(pred):  # per image
             seen += 1
+            i, t_cap = streams[j]  # stream (table) index, capture time
             if webcam:  # batch_size >= 1
-                p, im0, frame = path[i], im0s[i].copy(), dataset.count
+                p, im0 = path[j], im0s[j]
                 s += f'{i}: '
             else:
-                p, im0, frame = path, im0s.copy(), getattr(dataset, 'frame', 0)
+                p, im0 = path, im0s
 
             p = Path(p)  # to Path
-            save_path = str(save_dir / p.name)  # im.jpg
-            txt_path = str(save_dir / 'labels' / p.stem) + ('' if dataset.mode == 'image' else f'_{frame}')  # im.txt
+            txt_path = str(save_dir / 'labels' / p.stem) + ('' if mode == 'image' else f'_{frame}')  # im.txt
             s += '%gx%g ' % im.shape[2:]  # print string
             gn = torch.tensor(im0.shape)[[1, 0, 1, 0]]  # normalization gain whwh
-            imc = im0.copy() if save_crop else im0  # for save_crop
-            annotator = Annotator(im0, line_width=line_thickness, example=str(names))
+            if trackers:
+                det = trackers[i].update(det)[0]  # confirmed tracks with voted classes
             if len(det):
                 # Rescale boxes from img_size to im0 size
-                det[:, :4] = scale_coords(im.shape[2:], det[:, :4], im0.shape).round()
+                if transforms:  # from img_size to the play area crop, then to im0
+                    x1, y1, x2, y2 = seats.roi(im0.shape)
+                    det[:, :4] = scale_coords(im.shape[2:], det[:, :4], (y2 - y1, x2 - x1)).round()
+                    det[:, [0, 2]] += x1
+                    det[:, [1, 3]] += y1
+                else:
+                    det[:, :4] = scale_coords(im.shape[2:], det[:, :4], im0.shape).round()
 
                 # Print results
                 for c in det[:, 5].unique():
@@ -174,17 +201,37 @@ def run(
                     s += f"{n} {names[int(c)]}, "  # add to string
 
                 # Write results
-                for *xyxy, conf, cls in reversed(det):
-                    if save_txt:  # Write to file
+                if save_txt:  # Write to file
+                    for *xyxy, conf, cls in reversed(det):
                         xywh = (xyxy2xywh(torch.tensor(xyxy).view(1, 4)) / gn).view(-1).tolist()  # normalized xywh
                         line = (cls, *xywh, conf) if save_conf else (cls, *xywh)  # label format
                         with open(f'{txt_path}.txt', 'a') as f:
                             f.write(('%g ' * len(line)).rstrip() % line + '\n')
 
-                    if save_img or save_crop or view_img:  # Add bbox to image
-                        c = int(cls)  # integer class
-                        label = None if hide_labels else (names[c] if hide_conf else f'{names[c]} {conf:.2f}')
-                        annotator.box_label(xyxy, label, color=colors(c, True))
+            # Tarneeb
+            fps = vid_cap.get(cv2.CAP_PROP_FPS) if mode == 'video' else 0
+            t = frame * vid_stride / fps if fps else t_cap or time.monotonic()  # video timestamp, else capture time
+            if recorder:
+                recorder.write(det, t, i, im0.shape)
+            game = tables[i]
+            for c in game.update(det, t=t, seats=seats(det, im0.shape) if seats else None):
+                LOGGER.info(f'Table {i}: {names[c]} played, {game}')
+            if not headless:
+                results.append((i, p, im0, det, game.view()))
+        return results, s, vid_cap, mode, ms
+
+    def render(x):
+        results, s, vid_cap, mode, ms = x
+        for i, p, im0, det, (cards, winner, score) in results:
+            save_path = str(save_dir / p.name)  # im.jpg
+            im0 = im0.copy()
+            imc = im0.copy() if save_crop else im0  # for save_crop
+            annotator = Annotator(im0, line_width=line_thickness, example=str(names))
+            if save_img or save_crop or view_img:  # Add bbox to image
+                for *xyxy, conf, cls in reversed(det):
+                    c = int(cls)  # integer class
+                    label = None if hide_labels else (names[c] if hide_conf else f'{names[c]} {conf:.2f}')
+                    annotator.box_label(xyxy, label, color=colors(c, True))
                     if save_crop:
                         save_one_box(xyxy, imc, file=save_dir / 'crops' / names[c] / f'{p.stem}.jpg', BGR=True)
 
@@ -196,34 +243,15 @@ def run(
                     cv2.namedWindow(str(p), cv2.WINDOW_NORMAL | cv2.WINDOW_KEEPRATIO)  # allow window resize (Linux)
                     cv2.resizeWindow(str(p), im0.shape[1], im0.shape[0])
 
-                if winner: 
-                    cv2.rectangle(im0, (50,25), (400,100), (0,0,0), -1)
-                    cv2.putText(im0, f"Winner IS: {winner}", (80,70), font, 1, color, thick, cv2.LINE_4)
-                    cv2.imshow(str(p), im0)
-                    
-                if first:
-                    cv2.putText(im0, f"First Player: {first}", (70,150), font, 1, color, thick, cv2.LINE_4)
-                    cv2.imshow(str(p), im0)
-
-                if second:
-                    cv2.putText(im0, f"Second Player: {second}", (70,200), font, 1, color, thick, cv2.LINE_4)
-                    cv2.imshow(str(p), im0)
-
-                if third:
-                    cv2.putText(im0, f"Third Player: {third}", (70,250), font, 1, color, thick, cv2.LINE_4)
-                    cv2.imshow(str(p), im0)
-
-                
-                if fourth:
-                    cv2.putText(im0, f"Fourth Player: {fourth}", (70,300), font, 1, color, thick, cv2.LINE_4)
-                    cv2.imshow(str(p), im0)    
-                
+                draw_trick(im0, names, cards, winner, score, font, thick, color)
+                if seats:
+                    cv2.polylines(im0, [x.round().astype(np.int32) for x in seats.scale(im0.shape)], True, color, 2)
                 cv2.imshow(str(p), im0)
                 cv2.waitKey(1)  # 1 millisecond
 
             # Save results (image with detections)
             if save_img:
-                if dataset.mode == 'image':
+                if mode == 'image':
                     cv2.imwrite(save_path, im0)
                 else:  # 'video' or 'stream'
                     if vid_path[i] != save_path:  # new video
@@ -241,199 +269,32 @@ def run(
                     vid_writer[i].write(im0)
 
         # Print time (inference-only)
-        LOGGER.info(f"{s}{'' if len(det) else '(no detections), '}{dt[1].dt * 1E3:.1f}ms")
-        new_s = f"{s}{'' if len(det) else '(no detections), '}{dt[1].dt * 1E3:.1f}ms"
-        # Writing on Screen the Detections
-        ans = s[11: -1]
-        S, C, D, H = [], [], [], []
-        add = 0
-        if ans :
-            ans_list = ans.strip().split(',')[:-1]
-            for pred in ans_list:
-                if pred:
-                    if len(pred.split()) == 2 and pred.split()[0] == '3':
-                        add += 1
-                    elif len(pred.split()) == 2 and pred.split()[0] == '4':
-                        add += 1
-
-            if ans_list != [' ']:
-                final_list = [item.split()[-1] for item in ans_list]
-
-            for item in final_list:
-                
-                num = item[:-1]
-                typ = item[-1]
-
-                if typ.upper() == 'S':
-                    S.append(num)
-                if typ.upper() == 'C':
-                    C.append(num)
-                if typ.upper() == 'D':
-                    D.append(num)
-                if typ.upper() == 'H':
-                    H.append(num)
-        
-        else:
-            final_list = []
-
-        # Tarneeeb 
-        if final_list:
-
-            for card in final_list:
-                if card not in unique_cards:
-                    
-
-
-                    if not first:
-                        if card + ',' in new_s:
-                            ms_sum_1 += float(new_s[-7:-2])
-                            if ms_sum_1 >= 2000:
-                                        
-                                first = card
-                                game_type = card_type(first).upper()  
-                                unique_cards.add(card)  
-
-                    if not second and first and card != first:
-                        if card + ',' in new_s:
-                            ms_sum_2 += float(new_s[-7:-2])
-                            if ms_sum_2 >= 2000:
-                                second = card
-                                unique_cards.add(card)
-                    if not third and first and second and card != first and card != second:
-                        if card + ',' in new_s:
-                            ms_sum_3  += float(new_s[-7:-2])
-                            if ms_sum_3 >= 2000:
-                                third = card
-                                unique_cards.add(card)
-
-                    if not fourth and first and second and third and card != first and card != second and card != third:
-                        if card + ',' in new_s:
-                            ms_sum_4 += float(new_s[-7:-2])
-                            if ms_sum_4 >= 2000:
-
-                                fourth = card
-                                unique_cards.add(card)
-
-                    if first and second and third and fourth:
-                        break
-
-                if first:
-                    first = first.upper()
-                    print("First: ", first)
-                    cards_list.add(first)
-                    if len(cards_list) == 1:
-
-                        winner = 'First'
-
-                    print("Winner 1: ", winner)
-               
-                # ---------------- Second ----------------------
-                if second: 
-                    second = second.upper()
-                    print("Second: ", second)
-                    cards_list.add(second)
-
-                    if len(cards_list) == 2:
-                        if card_type(second) == game_type:
-                            if get_index(second) > get_index(first):
-                                winner = "Second"
-
-                        else:
-
-                            if card_type(second).lower() == trnb.lower():
-
-                                if second not in trnb_list:
-                                    trnb_list.append(second)
-
-                                if len(trnb_list) == 1:
-                                    winner = "Second"
-            
-                    print("Winner 2: ", winner)
-                # ---------------- Third ----------------------        
-                if third:
-                    third = third.upper()
-                    print("Third: ", third)
-                    cards_list.add(third)
-
-
-                    if len(cards_list) == 3:
-
-
-                        if len(trnb_list) == 1:
+        LOGGER.info(f"{s}{'' if len(det) else '(no detections), '}{ms}")
 
-                            if card_type(third).lower() == trnb.lower():
-                                if third not in trnb_list:
-                                    trnb_list.append(third)
-
-                                if get_index(third) > get_index(trnb_list[0]):
-                                    winner ='Third'
-
-
-                        else:
-
-                            if card_type(third) == game_type:
-
-                                if (get_index(third) > get_index(second)) and (get_index(third) > get_index(first)):
-                                    winner = "Third"        
-
-                            elif card_type(third).lower() == trnb.lower():
-                                if third not in trnb_list:
-                                    trnb_list.append(third)
-                                winner = 'Third'
-
-                
-                    print("Winner 3: ", winner)
-                # ---------------- Fourth ----------------------
-                if fourth:
-                    fourth = fourth.upper()
-                    print("Fourth: ", fourth)
-                    cards_list.add(fourth)
-
-                            
-                    if len(cards_list) == 4:
-                        
-                        if len(trnb_list) == 1 :
-
-                            if card_type(fourth).lower() == trnb.lower():
-                                if fourth not in trnb_list:
-                                    trnb_list.append(fourth)                                
-                                
-
-                                if get_index(fourth) > get_index(trnb_list[0]):
-                                    winner = 'Fourth'
-
-                        elif len(trnb_list) == 2:
-
-                            if card_type(fourth).lower() == trnb.lower():
-                                if fourth not in trnb_list:
-                                    trnb_list.append(fourth)
-
-                                if (get_index(fourth) > get_index(trnb_list[0])) and (get_index(fourth) > get_index(trnb_list[1])):
-                                    winner = 'Fourth'
-
-                        else:
-
-                            if card_type(fourth) == game_type:
-
-                                if (get_index(fourth) > get_index(third)) and (get_index(fourth) > get_index(second)) and (get_index(fourth) > get_index(first)):
-                                    winner = "Fourth"        
-
-                            elif card_type(fourth).lower() == trnb.lower():
-                                if fourth not in trnb_list:
-                                    trnb_list.append(fourth)
-                                winner = 'Fourth'            
-
-                    print("Winner Final: ", winner)
-
-        # cv2.putText(im0, f"Winner IS: {winner}", (150,150), font, 1, color, thick, cv2.LINE_4)
-        # cv2.imshow(str(p), im0)
-        # #time.sleep(0.9)
+    def drop(x):
+        # Release the input of a frame discarded by a latest-wins queue, no-op for items that hold none
+        if isinstance(x, tuple):
+            inputs.release(x[1])
 
+    stages = ('preprocess', preprocess), ('inference', inference), ('logic', logic)
+    if pipeline:  # each stage in its own thread, live sources drop stale frames
+        results = Pipeline(capture(), stages, drop=webcam, on_drop=drop)
+    else:
+        results = (logic(inference(preprocess(x))) for x in capture())
+    for x in results:
+        if not headless:
+            render(x)  # on the main thread for cv2.imshow()
+    if pipeline:
+        LOGGER.info(f'Pipeline: {results}')
 
-        
-        
     # Print results
-    t = tuple(x.t / seen * 1E3 for x in dt)  # speeds per image
+    if gate:
+        LOGGER.info(f'Motion gate: {gate}')
+    tables.close()
+    if recorder:
+        recorder.close()
+        LOGGER.info(f'{recorder.frames} frames of detections recorded to {recorder.path}')
+    t = tuple(x.t / max(seen, 1) * 1E3 for x in dt)  # speeds per image
     LOGGER.info(f'Speed: %.1fms pre-process, %.1fms inference, %.1fms NMS per image at shape {(1, 3, *imgsz)}' % t)
     if save_txt or save_img:
         s = f"\n{len(list(save_dir.glob('labels/*.txt')))} labels saved to {save_dir / 'labels'}" if save_txt else ''
@@ -471,7 +332,19 @@ def parse_opt():
     parser.add_argument('--half', action='store_true', help='use FP16 half-precision inference')
     parser.add_argument('--dnn', action='store_true', help='use OpenCV DNN for ONNX inference')
     parser.add_argument('--vid-stride', type=int, default=1, help='video frame-rate stride')
-    opt = parser.parse_args()
+    parser.add_argument('--track', action='store_true', help='track cards across frames')
+    parser.add_argument('--dwell', type=float, default=2.0, help='seconds a card must stay visible to be played')
+    parser.add_argument('--dwell-frames', type=int, default=0, help='frames a card must stay visible to be played')
+    parser.add_argument('--trump', nargs='+', type=str, help='trump suit per stream, i.e. --trump H S, or tables.yaml')
+    parser.add_argument('--pipeline', action='store_true', help='overlap capture, inference, logic and rendering')
+    parser.add_argument('--headless', action='store_true', help='skip annotation and rendering, only emit game events')
+    parser.add_argument('--events', type=str, help="game event log: file, '-' for stdout or tcp://host:port")
+    parser.add_argument('--seats', type=str, help='seat polygons yaml, i.e. data/seats.yaml')
+    parser.add_argument('--record', action='store_true', help='record detections for replay_trnb.py')
+    parser.add_argument('--motion-gate', type=float, default=0.0, help='infer only when this frame fraction changed')
+    parser.add_argument('--video-backend', default='cv2', choices=('cv2', 'pyav', 'ffmpeg'), help='video file decoder')
+    parser.add_argument('--preset', type=str, help='named preset, i.e. cards for data/presets/cards.yaml')
+    opt = apply_preset(parser.parse_args(), parser, 'detect_trnb')
     opt.imgsz *= 2 if len(opt.imgsz) == 1 else 1  # expand
     print_args(vars(opt))
     return opt
@@ -68,8 +68,9 @@ if platform.system() != 'Windows':
 from models.experimental import attempt_load
 from models.yolo import ClassificationModel, Detect, DetectionModel, SegmentationModel
 from utils.dataloaders import LoadImages
-from utils.general import (LOGGER, Profile, check_dataset, check_img_size, check_requirements, check_version,
-                           check_yaml, colorstr, file_size, get_default_args, print_args, url2file, yaml_save)
+from utils.general import (LOGGER, Profile, apply_preset, check_dataset, check_img_size, check_requirements,
+                           check_version, check_yaml, colorstr, file_size, get_default_args, print_args, url2file,
+                           yaml_save)
 from utils.torch_utils import select_device, smart_inference_mode
 
 MACOS = platform.system() == 'Darwin'  # macOS environment
@@ -600,7 +601,8 @@ def parse_opt():
                         nargs='+',
                         default=['torchscript'],
                         help='torchscript, onnx, openvino, engine, coreml, saved_model, pb, tflite, edgetpu, tfjs')
-    opt = parser.parse_args()
+    parser.add_argument('--preset', type=str, help='named preset, i.e. cards for data/presets/cards.yaml')
+    opt = apply_preset(parser.parse_args(), parser, 'export')
     print_args(vars(opt))
     return opt
 
@@ -3,8 +3,44 @@ import time
 from PIL import Image
 import numpy as np
 import torch
-from detect import detect
 import cv2
+from app import loadModel, predictImage  # process-wide cached model shared with app.py
+from utils.cards import CardOverlay, get_cards
+from utils.plots import Annotator, colors
+from utils.tarneeb import TarneebSession, draw_trick, parse_suit
+
+try:
+    import av
+    from streamlit_webrtc import webrtc_streamer  # live webcam streaming, pip install streamlit-webrtc
+except ImportError:
+    webrtc_streamer = None
+
+
+class LiveCards:
+    # Webcam session state, card inventory and Tarneeb game updated from every processed frame
+    def __init__(self, trump='S', mode='Card inventory'):
+        self.model = loadModel()
+        self.names = self.model.names
+        self.overlay = CardOverlay(get_cards(self.names))
+        self.game = TarneebSession(self.names, trump)
+        self.mode = mode  # 'Card inventory' or 'Tarneeb'
+
+    def __call__(self, frame):
+        # streamlit-webrtc frame callback, runs on a worker thread that drops frames arriving during inference
+        im0 = frame.to_ndarray(format='bgr24')
+        det = self.model.predict(im0)
+        self.game.update(det, t=frame.time)  # stream timestamp, game advances whichever overlay is shown
+        annotator = Annotator(im0, example=str(self.names))
+        for *xyxy, conf, cls in det:
+            c = int(cls)
+            annotator.box_label(xyxy, f'{self.names[c]} {conf:.2f}', color=colors(c, True))
+        im = annotator.result()
+        if self.mode == 'Tarneeb':
+            draw_trick(im, self.names, *self.game.view())
+        else:
+            self.overlay(im, det)
+        return av.VideoFrame.from_ndarray(im, format='bgr24')
+
 # Header
 
 st.markdown("# Playing Cards Detection")
@@ -35,12 +71,16 @@ with col4:
 # Section 2:
 
 
+def show_prediction(file):
+    # Decode an uploaded or camera image in memory, show it with its detected cards
+    im0 = cv2.imdecode(np.frombuffer(file.getvalue(), np.uint8), cv2.IMREAD_COLOR)
+    st.image(predictImage(im0), channels='BGR')
+
+
 # Check Compatible Files
 image = st.file_uploader("asfd", type=['jpg','png','jpeg'])
 if image is not None:
-    show_image = Image.open(image)
-    img_array = np.array(show_image)
-    st.image(img_array)
+    show_prediction(image)
 #def check_image(img):
     
 # Check Buttons
@@ -64,11 +104,12 @@ if upload_photo :
     #    python .\detect.py --weights best_weights.pt --img 640 --conf 0.25 --source image
         
     if image is not None:
-        show_image = Image.open(image)
-        st.image(show_image)
+        show_prediction(image)
     
 if live_photo :
     image = st.camera_input("")
+    if image is not None:
+        show_prediction(image)
     
 if upload_video :
     video = st.file_uploader("")
@@ -83,9 +124,22 @@ if upload_video :
             
     
 if live_video :
-    live = st.camera_input("")
-
-
-
-    
+    st.session_state.live = True
 
+if st.session_state.get('live'):
+    mode = st.radio("Overlay", ['Card inventory', 'Tarneeb'], horizontal=True)
+    trump = st.selectbox("Tarneeb", ['S', 'H', 'D', 'C'])
+    if webrtc_streamer is None:
+        st.warning("Install streamlit-webrtc for live streaming, showing single photos instead")
+        live = st.camera_input("")
+        if live is not None:
+            show_prediction(live)
+    else:
+        if 'live_cards' not in st.session_state:
+            st.session_state.live_cards = LiveCards(trump, mode)
+        live = st.session_state.live_cards
+        live.mode = mode
+        if live.game.trick.trump != parse_suit(trump):
+            live.game.set_trump(trump)  # takes effect on the current trick
+        webrtc_streamer(key="cards", video_frame_callback=live, async_processing=True,
+                        media_stream_constraints={"video": True, "audio": False})
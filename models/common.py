@@ -774,20 +774,53 @@ class Detections:
     def pandas(self):
         # return detections as pandas DataFrames, i.e. print(results.pandas().xyxy[0])
         new = copy(self)  # return copy
-        ca = 'xmin', 'ymin', 'xmax', 'ymax', 'confidence', 'class', 'name'  # xyxy columns
-        cb = 'xcenter', 'ycenter', 'width', 'height', 'confidence', 'class', 'name'  # xywh columns
-        for k, c in zip(['xyxy', 'xyxyn', 'xywh', 'xywhn'], [ca, ca, cb, cb]):
-            a = [[x[:5] + [int(x[5]), self.names[int(x[5])]] for x in x.tolist()] for x in getattr(self, k)]  # update
-            setattr(new, k, [pd.DataFrame(x, columns=c) for x in a])
+        for k in 'xyxy', 'xyxyn', 'xywh', 'xywhn':
+            setattr(new, k, [pd.DataFrame({c: x[c].astype(float) if i < 5 else x[c]
+                                           for i, c in enumerate(x.dtype.names)}) for x in self.to_records(k)])
         return new
 
+    def to_numpy(self, kind='xyxy'):
+        # return list of (n,6) float32 numpy arrays [box, conf, cls] per image with one device transfer, kind is
+        # 'xyxy', 'xyxyn', 'xywh' or 'xywhn'
+        x = getattr(self, kind)
+        return np.split(torch.cat(x).float().cpu().numpy(), np.cumsum([len(i) for i in x[:-1]]))
+
+    def to_records(self, kind='xyxy'):
+        # return list of columnar numpy record arrays per image with pandas() columns, i.e. for pd.DataFrame(r) or
+        # pyarrow.Table.from_pandas(pd.DataFrame(r))
+        c = ('xmin', 'ymin', 'xmax', 'ymax') if kind.startswith('xyxy') else ('xcenter', 'ycenter', 'width', 'height')
+        names = self._names()
+        return [np.rec.fromarrays([*x[:, :5].T, x[:, 5].astype(int), names[x[:, 5].astype(int)]],
+                                  names=(*c, 'confidence', 'class', 'name')) for x in self.to_numpy(kind)]
+
+    def to_json(self, kind='xyxy'):
+        # return list of JSON records bytes per image, same fields as pandas().xyxy[i].to_json(orient='records')
+        c = ('xmin', 'ymin', 'xmax', 'ymax') if kind.startswith('xyxy') else ('xcenter', 'ycenter', 'width', 'height')
+        f = '{' + ','.join(f'"{k}":%.9g' for k in (*c, 'confidence')) + ',"class":%d,"name":%s}'  # float32 exact
+        names = [json.dumps(x) for x in self._names().tolist()]  # escaped once per class
+        y = []
+        for x in self.to_numpy(kind):
+            cls = x[:, 5].astype(int).tolist()
+            y.append(('[' + ','.join(f % (*r, i, names[i]) for r, i in zip(x[:, :5].tolist(), cls)) + ']').encode())
+        return y
+
+    def _names(self):
+        # class names as a numpy object array for vectorised lookup by class index
+        if not hasattr(self, '_names_array'):
+            names = self.names
+            names = [names[i] for i in range(len(names))] if isinstance(names, dict) else list(names)
+            self._names_array = np.array(names, dtype=object)
+        return self._names_array
+
     def tolist(self):
         # return a list of Detections objects, i.e. 'for result in results.tolist():'
-        r = range(self.n)  # iterable
-        x = [Detections([self.ims[i]], [self.pred[i]], [self.files[i]], self.times, self.names, self.s) for i in r]
-        # for d in x:
-        #    for k in ['ims', 'pred', 'xyxy', 'xyxyn', 'xywh', 'xywhn']:
-        #        setattr(d, k, getattr(d, k)[0])  # pop out of list
+        x = []
+        for i in range(self.n):
+            d = copy(self)  # shallow copy, boxes and normalizations are shared rather than recomputed
+            for k in 'ims', 'pred', 'files', 'xyxy', 'xyxyn', 'xywh', 'xywhn':
+                setattr(d, k, getattr(self, k)[i:i + 1])
+            d.n, d.t = 1, tuple(t.t * 1E3 for t in self.times)
+            x.append(d)
         return x
 
     def print(self):
@@ -40,6 +40,7 @@ if str(ROOT) not in sys.path:
 ROOT = Path(os.path.relpath(ROOT, Path.cwd()))  # relative
 
 from models.common import DetectMultiBackend
+from utils.cards import CardOverlay, get_cards
 from utils.dataloaders import IMG_FORMATS, VID_FORMATS, LoadImages, LoadScreenshots, LoadStreams
 from utils.general import (LOGGER, Profile, check_file, check_img_size, check_imshow, check_requirements, colorstr, cv2,
                            increment_path, non_max_suppression, print_args, scale_boxes, strip_optimizer, xyxy2xywh)
@@ -95,6 +96,7 @@ def run(
     model = DetectMultiBackend(weights, device=device, dnn=dnn, data=data, fp16=half)
     stride, names, pt = model.stride, model.names, model.pt
     imgsz = check_img_size(imgsz, s=stride)  # check image size
+    cards = get_cards(names)  # class id to rank/suit lookups
 
     # Dataloader
     bs = 1  # batch_size
@@ -107,6 +109,7 @@ def run(
     else:
         dataset = LoadImages(source, img_size=imgsz, stride=stride, auto=pt, vid_stride=vid_stride)
     vid_path, vid_writer = [None] * bs, [None] * bs
+    overlays = [CardOverlay(cards) for _ in range(bs)]
 
     # Run inference
     model.warmup(imgsz=(1 if pt or model.triton else bs, 3, *imgsz))  # warmup
@@ -178,7 +181,7 @@ def run(
                     windows.append(p)
                     cv2.namedWindow(str(p), cv2.WINDOW_NORMAL | cv2.WINDOW_KEEPRATIO)  # allow window resize (Linux)
                     cv2.resizeWindow(str(p), im0.shape[1], im0.shape[0])
-                
+                overlays[i](im0, det, 0 if dataset.mode == 'image' else None)  # redrawn on hand changes, photos fresh
                 cv2.imshow(str(p), im0)
                 cv2.waitKey(1)  # 1 millisecond
 
@@ -203,99 +206,6 @@ def run(
 
         # Print time (inference-only)
         LOGGER.info(f"{s}{'' if len(det) else '(no detections), '}{dt[1].dt * 1E3:.1f}ms")
-        dic = {  "0": "10C","1": "10D","2": "10H","3": "10S","4": "2C","5": "2D","6": "2H","7": "2S","8": "3C","9": "3D","10": "3H","11": "3S","12": "4C","13": "4D","14": "4H","15": "4S","16": "5C","17": "5D","18": "5H","19": "5S","20": "6C","21": "6D","22": "6H","23": "6S","24": "7C","25": "7D","26": "7H","27": "7S","28": "8C","29": "8D","30": "8H","31": "8S","32": "9C" ,"33": "9D","34": "9H" ,"35": "9S" ,"36": "AC","37": "AD","38": "AH" ,"39": "AS","40": "JC" ,"41": "JD","42": "JH","43": "Joker","44": "JS","45": "KC","46": "KD","47": "KH","48": "KS","49": "QC","50": "QD","51": "QH","52": "QS" ,"53": "backcard" }
-
-        ans = s[10: -1]
-        S, C, D, H = [], [], [], []
-
-        add = 0
-
-        if ans :
-            ans_list = ans.strip().split(',')[:-1]
-            for pred in ans_list:
-                if pred:
-                    if len(pred.split()) == 2 and pred.split()[0] == '3':
-                        add += 1
-                        print("add", add)
-                    elif len(pred.split()) == 2 and pred.split()[0] == '4':
-                        add += 1
-                        print("add", add)
-
-            print("ans_list", ans_list)
-            if ans_list != [' ']:
-                final_list = [item.split()[-1] for item in ans_list]
-                print("Items: ", final_list)
-
-            for item in final_list:
-                #if item[-1] == 's':
-                #    item = item[:-1]
-
-                if len(item) == 3:
-                    num = item[:2]
-                    typ = item[-1]
-
-                else:
-                    num = item[:1]
-                    typ = item[-1]
-
-            
-                if typ.upper() == 'S':
-                    S.append(num)
-                if typ.upper() == 'C':
-                    C.append(num)
-                if typ.upper() == 'D':
-                    D.append(num)
-                if typ.upper() == 'H':
-                    H.append(num)
-
-        #print("S:", S)
-        #print("C:", C)
-        #print("D:", D)
-        #print("H:", H)
-        
-        else:
-            final_list = []
-
-        font = cv2.FONT_HERSHEY_TRIPLEX
-        thick = 3
-        color = (255,255,255)
-        
-        num_of_cards = det.shape[0]
-        cv2.putText(im0,f"No. Cards: {len(final_list) + add}", (50, 30), font, 1, color, thick, cv2.LINE_4)
-
-        if S:
-            cv2.putText(im0, f"Spade: {[i for i in S]}", (50,90),font, 1, color , thick, cv2.LINE_4)
-        cv2.imshow(str(p), im0)
-        
-        if C:
-            cv2.putText(im0, f"Club: {[i for i in C]}", (50,150),font, 1, color, thick, cv2.LINE_4)
-        cv2.imshow(str(p), im0)
-
-        if D:
-            cv2.putText(im0, f"Diamond: {[i for i in D]}", (50,250),font, 1, color, thick, cv2.LINE_4)
-        cv2.imshow(str(p), im0)
-
-        if H:
-            cv2.putText(im0, f"Heart: {[i for i in H]}", (50,350),font, 1, color, thick, cv2.LINE_4)
-        cv2.imshow(str(p), im0)
-
-        from math import atan2, degrees, radians
-
-        def get_angle(point_1, point_2): #These can also be four parameters instead of two arrays
-            angle = atan2(point_1[1] - point_2[1], point_1[0] - point_2[0])
-            
-            #Optional
-            angle = degrees(angle)
-            
-            # OR
-            #angle = radians(angle)
-            
-            return angle
-
-        
-        print(det)
-
-
 
     # Print results
     t = tuple(x.t / seen * 1E3 for x in dt)  # speeds per image
@@ -0,0 +1,86 @@
+# YOLOv5 🚀 by Ultralytics, GPL-3.0 license
+"""
+Replay recorded detections through the Tarneeb game logic, faster than real time
+
+Usage - record with detect_trnb.py, then replay:
+    $ python detect_trnb.py --weights cards.pt --source game.mp4 --trump H --record
+    $ python replay_trnb.py --source runs/detect/exp/detections.trnb --events -  # game events to stdout
+    $ python replay_trnb.py --source recordings/  # every *.trnb log in a directory
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[0]  # YOLOv5 root directory
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))  # add ROOT to PATH
+ROOT = Path(os.path.relpath(ROOT, Path.cwd()))  # relative
+
+from utils.general import LOGGER, print_args
+from utils.recorder import DetReader
+from utils.tarneeb import TarneebSeats, TarneebTables
+
+
+def run(
+        source=ROOT / 'runs/detect/exp/detections.trnb',  # detection log(s) or directory of *.trnb logs
+        trump=None,  # trump suit(s) per table, None to use the recorded trump
+        conf_thres=None,  # minimum card confidence, None to use the recorded value
+        dwell=None,  # seconds a card must stay visible to be played, None to use the recorded value
+        dwell_frames=None,  # frames a card must stay visible to be played, 0 for time only, None to use the recorded
+        seats=None,  # seat polygons yaml, assigns cards to players by location
+        events=None,  # game event log, '-' for stdout, 'tcp://host:port' for a socket
+):
+    files = []
+    for s in source if isinstance(source, (list, tuple)) else [source]:
+        p = Path(s)
+        files += sorted(p.glob('*.trnb')) if p.is_dir() else [p]
+    assert files, f'No detection logs found in {source}'
+    seats = TarneebSeats(seats) if seats else None
+
+    nf, ne, t0 = 0, 0, time.perf_counter()  # frames, played cards, start time
+    for f in files:
+        log = DetReader(f)
+        meta = log.meta
+        tables = TarneebTables(log.names, trump or meta.get('trump') or 'S', n=meta.get('tables', 1), log=events,
+                               conf_thres=meta.get('conf_thres', 0.25) if conf_thres is None else conf_thres,
+                               dwell=meta.get('dwell', 2.0) if dwell is None else dwell,
+                               frames=meta.get('dwell_frames', 0) if dwell_frames is None else dwell_frames,
+                               grace=meta.get('grace', 0.5))
+        for table, t, shape, det in log:
+            played = tables[table].update(det, t=t, seats=seats(det, shape) if seats else None)
+            nf, ne = nf + 1, ne + len(played)
+        LOGGER.info(f"{f}: {', '.join(f'table {i} {game}' for i, game in enumerate(tables))}")
+        tables.close()
+
+    # Print results
+    dt = time.perf_counter() - t0
+    LOGGER.info(f'Replayed {len(files)} logs, {nf} frames, {ne} cards played in {dt:.2f}s '
+                f'({nf / dt:.0f} frames/s, {dt / max(nf, 1) * 1E6:.1f}us per frame)')
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--source', nargs='+', type=str, default=ROOT / 'runs/detect/exp/detections.trnb',
+                        help='detection log(s) or directory of *.trnb logs')
+    parser.add_argument('--trump', nargs='+', type=str, help='trump suit per table, default recorded trump')
+    parser.add_argument('--conf-thres', type=float, help='card confidence threshold, default recorded value')
+    parser.add_argument('--dwell', type=float, help='seconds a card must stay visible to be played, default recorded')
+    parser.add_argument('--dwell-frames', type=int, help='frames a card must stay visible, default recorded')
+    parser.add_argument('--seats', type=str, help='seat polygons yaml, i.e. data/seats.yaml')
+    parser.add_argument('--events', type=str, help="game event log: file, '-' for stdout or tcp://host:port")
+    opt = parser.parse_args()
+    print_args(vars(opt))
+    return opt
+
+
+def main(opt):
+    run(**vars(opt))
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    main(opt)
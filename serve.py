@@ -0,0 +1,77 @@
+# YOLOv5 🚀 by Ultralytics, GPL-3.0 license
+"""
+Run a persistent local YOLOv5 inference server, so clients skip model loading, fusing and warmup on every run
+
+Usage - server:
+    $ python serve.py --weights cards.pt --preset cards                        # http://127.0.0.1:8500
+    $ python serve.py --weights cards.pt --address unix:///tmp/yolov5.sock    # Unix socket
+
+Usage - clients:
+    $ python detect.py --server http://127.0.0.1:8500 --source 0
+    $ python utils/flask_rest_api/restapi.py --server http://127.0.0.1:8500
+    $ streamlit run app.py                                                    # YOLOV5_SERVER environment variable
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[0]  # YOLOv5 root directory
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))  # add ROOT to PATH
+ROOT = Path(os.path.relpath(ROOT, Path.cwd()))  # relative
+
+from models.common import DetectMultiBackend
+from utils.general import apply_preset, check_img_size, check_requirements, print_args
+from utils.server import ADDRESS, InferenceServer
+from utils.torch_utils import select_device
+
+
+def run(
+        weights=ROOT / 'yolov5s.pt',  # model.pt path(s)
+        data=ROOT / 'data/coco128.yaml',  # dataset.yaml path
+        imgsz=(640, 640),  # inference size (height, width) for encoded image requests
+        conf_thres=0.25,  # default confidence threshold
+        iou_thres=0.45,  # default NMS IOU threshold
+        max_det=1000,  # default maximum detections per image
+        device='',  # cuda device, i.e. 0 or 0,1,2,3 or cpu
+        half=False,  # use FP16 half-precision inference
+        dnn=False,  # use OpenCV DNN for ONNX inference
+        address=ADDRESS,  # 'http://host:port' or 'unix:///path.sock'
+):
+    # Load model once, warm up and serve until interrupted
+    device = select_device(device)
+    model = DetectMultiBackend(weights, device=device, dnn=dnn, data=data, fp16=half)
+    imgsz = check_img_size(imgsz, s=model.stride)  # check image size
+    InferenceServer(model, imgsz, conf_thres, iou_thres, max_det).serve(address)
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--weights', nargs='+', type=str, default=ROOT / 'yolov5s.pt', help='model path(s)')
+    parser.add_argument('--data', type=str, default=ROOT / 'data/coco128.yaml', help='(optional) dataset.yaml path')
+    parser.add_argument('--imgsz', '--img', '--img-size', nargs='+', type=int, default=[640], help='inference size h,w')
+    parser.add_argument('--conf-thres', type=float, default=0.25, help='default confidence threshold')
+    parser.add_argument('--iou-thres', type=float, default=0.45, help='default NMS IoU threshold')
+    parser.add_argument('--max-det', type=int, default=1000, help='default maximum detections per image')
+    parser.add_argument('--device', default='', help='cuda device, i.e. 0 or 0,1,2,3 or cpu')
+    parser.add_argument('--half', action='store_true', help='use FP16 half-precision inference')
+    parser.add_argument('--dnn', action='store_true', help='use OpenCV DNN for ONNX inference')
+    parser.add_argument('--address', default=ADDRESS, help='http://host:port or unix:///path.sock')
+    parser.add_argument('--preset', type=str, help='named preset, i.e. cards for data/presets/cards.yaml')
+    opt = apply_preset(parser.parse_args(), parser, 'serve')
+    opt.imgsz *= 2 if len(opt.imgsz) == 1 else 1  # expand
+    print_args(vars(opt))
+    return opt
+
+
+def main(opt):
+    check_requirements(exclude=('tensorboard', 'thop'))
+    run(**vars(opt))
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    main(opt)
@@ -0,0 +1,79 @@
+# YOLOv5 🚀 by Ultralytics, GPL-3.0 license
+"""
+Dynamic micro-batching of concurrent inference requests
+
+Usage:
+    from utils.batcher import MicroBatcher
+    batcher = MicroBatcher(lambda ims: model(ims, size=640).tolist(), max_batch=8, max_latency=0.01)
+    result = batcher(im)  # from any request thread, blocks until its batch has run
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    # Collect requests for up to max_latency seconds or max_batch items, run fn once on the list, scatter the results
+    def __init__(self, fn, max_batch=8, max_latency=0.01):
+        self.fn = fn  # list of inputs -> list of outputs, same order
+        self.max_batch = max_batch  # maximum items per batch
+        self.max_latency = max_latency  # maximum seconds the first item of a batch waits for others
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()  # guards stats
+        self.batches = self.items = self.max_depth = 0  # batches run, items processed, peak queue depth
+        self.t_wait = self.t_run = 0.0  # smoothed queue wait and batch run time (s)
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def submit(self, x):
+        # Queue input x, return a Future of its output
+        f = Future()
+        self.queue.put((x, f, time.perf_counter()))
+        with self.lock:
+            self.max_depth = max(self.max_depth, self.queue.qsize())
+        return f
+
+    def __call__(self, x, timeout=None):
+        return self.submit(x).result(timeout)
+
+    def _worker(self):
+        while True:
+            batch = [self.queue.get()]  # block for the first item
+            deadline = time.perf_counter() + self.max_latency
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.queue.get(timeout=max(deadline - time.perf_counter(), 0)))
+                except queue.Empty:
+                    break
+            xs, fs, ts = zip(*batch)
+            t0 = time.perf_counter()
+            try:
+                ys = self.fn(list(xs))
+                for f, y in zip(fs, ys):
+                    f.set_result(y)
+            except Exception as e:
+                for f in fs:
+                    if not f.done():
+                        f.set_exception(e)
+            t1 = time.perf_counter()
+            with self.lock:
+                wait = sum(t0 - t for t in ts) / len(ts)
+                self.t_wait = wait if not self.batches else 0.9 * self.t_wait + 0.1 * wait
+                self.t_run = t1 - t0 if not self.batches else 0.9 * self.t_run + 0.1 * (t1 - t0)
+                self.batches += 1
+                self.items += len(batch)
+
+    def stats(self):
+        # Queue depth and batching metrics, i.e. for a /metrics endpoint
+        with self.lock:
+            return {
+                'queue_depth': self.queue.qsize(),
+                'max_queue_depth': self.max_depth,
+                'batches': self.batches,
+                'items': self.items,
+                'mean_batch_size': round(self.items / max(self.batches, 1), 2),
+                'wait_ms': round(self.t_wait * 1E3, 2),
+                'run_ms': round(self.t_run * 1E3, 2),
+                'max_batch': self.max_batch,
+                'max_latency_ms': self.max_latency * 1E3}
@@ -0,0 +1,166 @@
+# YOLOv5 🚀 by Ultralytics, GPL-3.0 license
+"""
+Playing card class decoding tables
+
+Usage:
+    from utils.cards import get_cards
+    cards = get_cards(model.names)  # precomputed for the 52 and 54-class orderings
+    n = cards.count(det)  # detections per class id
+    n = cards.count(det, grouped=True)  # physical cards per class id, corner indices of one card counted once
+    spades, hearts, diamonds, clubs = cards.suits(np.flatnonzero(n))  # rank labels per suit
+    overlay = CardOverlay(cards)
+    im0 = overlay(im0, det)  # draw cached card inventory text layer
+"""
+
+import cv2
+import numpy as np
+import torch
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+RANKS = '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A'  # low to high
+SUITS = 'S', 'H', 'D', 'C'  # spades, hearts, diamonds, clubs
+SUIT_NAMES = 'Spade', 'Heart', 'Diamond', 'Club'
+NAMES52 = tuple(f'{r}{s}' for s in 'SCHD' for r in ('A', *RANKS[:-1]))  # data/custom_data.yaml order
+NAMES54 = ('10C', '10D', '10H', '10S', '2C', '2D', '2H', '2S', '3C', '3D', '3H', '3S', '4C', '4D', '4H', '4S', '5C',
+           '5D', '5H', '5S', '6C', '6D', '6H', '6S', '7C', '7D', '7H', '7S', '8C', '8D', '8H', '8S', '9C', '9D', '9H',
+           '9S', 'AC', 'AD', 'AH', 'AS', 'JC', 'JD', 'JH', 'Joker', 'JS', 'KC', 'KD', 'KH', 'KS', 'QC', 'QD', 'QH',
+           'QS', 'backcard')  # 54-class order with Joker and card back
+
+
+def group_corners(det, reach=6.0, ratio=2.0, near=2.0, corners=2):
+    # Group same-class corner index detections det(n,6) into physical cards by box geometry.
+    # Two boxes link if their centres lie within reach mean box sizes and their sizes differ less than ratio x.
+    # Indices of one card sit at its corners, at least a card side apart, so linked boxes closer than near mean box
+    # sizes (i.e. stacked or overlapping duplicates) go to different cards, each holding at most corners boxes.
+    # corners=2 matches standard 2-index decks and counts side-by-side duplicates separately, 4-index decks then count
+    # twice when all four corners are visible. Returns card index per detection and the number of cards
+    det = det.cpu().numpy() if isinstance(det, torch.Tensor) else np.asarray(det)
+    n = len(det)
+    if not n:
+        return np.zeros(0, dtype=int), 0
+    c = (det[:, :2] + det[:, 2:4]) / 2  # box centres
+    size = (det[:, 2:4] - det[:, :2]).max(1).clip(1e-6)  # box sizes (longest side)
+    d2 = ((c[:, None] - c[None]) ** 2).sum(2)  # squared centre distances (n,n)
+    s1, s2 = size[:, None], size[None]
+    adj = (det[:, None, 5] == det[None, :, 5]) & (d2 < (reach * (s1 + s2) / 2) ** 2)  # same class, close
+    adj &= np.maximum(s1, s2) < ratio * np.minimum(s1, s2)  # similar size
+    _, group = connected_components(csr_matrix(adj), directed=False)
+    _, stack = connected_components(csr_matrix(adj & (d2 < (near * (s1 + s2) / 2) ** 2)), directed=False)  # coincident
+
+    def rank(key):
+        # Position of each box among boxes with the same key, in x order
+        order = np.lexsort((c[:, 0], key))
+        r = np.empty(n, dtype=int)
+        r[order] = np.arange(n) - np.searchsorted(key[order], key[order])
+        return r
+
+    # The k-th box of every stack in a group joins layer k, so stacked boxes never share a card, then each layer
+    # splits into cards of up to corners boxes in x order
+    layer = group * n + rank(stack)
+    card = np.unique(layer * n + rank(layer) // corners, return_inverse=True)[1].reshape(-1)
+    return card, int(card.max()) + 1
+
+
+def card_tables(names):
+    # Return rank and suit lookup arrays indexed by class id, -1 for non-card classes (i.e. Joker, backcard)
+    names = dict(enumerate(names)) if isinstance(names, (list, tuple)) else names
+    rank = np.full(max(names) + 1, -1, dtype=np.int16)
+    suit = rank.copy()
+    for i, name in names.items():
+        r, s = str(name)[:-1].upper(), str(name)[-1:].upper()
+        if r in RANKS and s in SUITS:
+            rank[i], suit[i] = RANKS.index(r), SUITS.index(s)
+    return rank, suit
+
+
+class Cards:
+    # Class id to rank, suit and label lookup tables. Usage: cards = Cards(model.names); n = cards.count(det)
+    def __init__(self, names):
+        self.rank, self.suit = card_tables(names)  # rank and suit index per class id, -1 for non-cards
+        self.card = self.rank >= 0  # playing card mask per class id
+        self.label = np.array([RANKS[r] if r >= 0 else '' for r in self.rank])  # rank label per class id
+        for x in self.rank, self.suit, self.card, self.label:
+            x.flags.writeable = False  # shared tables
+
+    def __len__(self):
+        return len(self.rank)
+
+    def count(self, det, grouped=False):
+        # Return detections per class id for det(n,6) = [xyxy, conf, cls], non-card classes zeroed.
+        # grouped=True counts physical cards instead, merging corner indices of the same card with group_corners()
+        det = det.cpu().numpy() if isinstance(det, torch.Tensor) else np.asarray(det)
+        cls = det[:, 5].astype(int)
+        if grouped:
+            card, n = group_corners(det)
+            cls = np.zeros(n, dtype=int)
+            cls[card] = det[:, 5]  # class per physical card
+        return np.bincount(cls, minlength=len(self)) * self.card
+
+    def suits(self, cls):
+        # Group card class ids cls by suit, return rank label lists in SUITS order
+        cls = np.asarray(cls, dtype=int)
+        return [self.label[cls[self.suit[cls] == s]].tolist() for s in range(len(SUITS))]
+
+
+CARDS52, CARDS54 = Cards(NAMES52), Cards(NAMES54)
+
+
+def get_cards(names):
+    # Return precomputed Cards for the 52 or 54-class orderings, else build new tables for names
+    names = tuple(names.values()) if isinstance(names, dict) else tuple(names)
+    return {NAMES52: CARDS52, NAMES54: CARDS54}.get(names) or Cards(names)
+
+
+class CardOverlay:
+    # Cached card inventory text layer, redrawn on hand changes. Usage: overlay = CardOverlay(cards); overlay(im0, det)
+    def __init__(self, cards, debounce=3, font=cv2.FONT_HERSHEY_TRIPLEX, thick=3, color=(255, 255, 255)):
+        self.cards = cards  # Cards lookup tables
+        self.debounce = debounce  # frames a new hand must persist before the layer is redrawn
+        self.font, self.thick, self.color = font, thick, color
+        self.hand = self.pending = None  # shown hand, candidate hand
+        self.n = 0  # frames the candidate hand has persisted
+        self.layer = self.mask = self.shape = None  # cached BGR text layer, its mask and the image shape it fits
+
+    def read(self, det):
+        # Return the hand in det(n,6) as (number of cards, spade, heart, diamond, club rank labels)
+        n = self.cards.count(det, grouped=True)  # physical cards per class
+        cls = np.repeat(np.arange(len(n)), n)  # cards in view, repeated for duplicate decks
+        return (len(cls), *(tuple(x) for x in self.cards.suits(cls)))
+
+    def update(self, det, debounce=None):
+        # Update with one frame of detections, return True if the shown hand changed. debounce overrides self.debounce,
+        # i.e. 0 for independent photos that must never show the previous image's hand
+        debounce = self.debounce if debounce is None else debounce
+        hand = self.read(det)
+        if hand == self.hand:
+            self.pending, self.n = None, 0
+            return False
+        self.n = self.n + 1 if hand == self.pending else 1
+        self.pending = hand
+        if self.hand is not None and self.n < debounce:
+            return False
+        self.hand, self.pending, self.n, self.layer = hand, None, 0, None
+        return True
+
+    def render(self, shape):
+        # Draw the shown hand onto a new text layer for images of shape (h, w)
+        n, S, H, D, C = self.hand
+        layer = np.zeros((min(shape[0], 370), shape[1], 3), dtype=np.uint8)  # text rows only
+        lines = ('No. Cards', n, 30), ('Spade', S, 90), ('Club', C, 150), ('Diamond', D, 250), ('Heart', H, 350)
+        for k, v, y in lines:
+            if v or k == 'No. Cards':
+                text = f'{k}: {list(v) if isinstance(v, tuple) else v}'
+                cv2.putText(layer, text, (50, y), self.font, 1, self.color, self.thick, cv2.LINE_4)
+        mask = layer.any(2)
+        w = int(np.flatnonzero(mask.any(0)).max(initial=0)) + 1  # crop to text width
+        self.layer, self.mask, self.shape = layer[:, :w].copy(), mask[:, :w].astype(np.uint8), shape[:2]
+
+    def __call__(self, im, det, debounce=None):
+        # Update with det and composite the text layer onto BGR image im in place, return im
+        self.update(det, debounce)
+        if self.layer is None or self.shape != im.shape[:2]:
+            self.render(im.shape)
+        h, w = self.mask.shape
+        cv2.copyTo(self.layer, self.mask, im[:h, :w])  # single masked composite, in place
+        return im
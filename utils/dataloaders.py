@@ -9,13 +9,17 @@ import hashlib
 import json
 import math
 import os
+import queue
 import random
 import shutil
+import subprocess
 import time
-from itertools import repeat
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice, repeat
 from multiprocessing.pool import Pool, ThreadPool
 from pathlib import Path
-from threading import Thread
+from threading import Event, Thread
 from urllib.parse import urlparse
 from zipfile import ZipFile
 
@@ -185,21 +189,130 @@ class _RepeatSampler:
             yield from iter(self.sampler)
 
 
+def source_files(path):
+    # Return sorted files of a file, directory or glob source, or a list of them
+    files = []
+    for p in sorted(path) if isinstance(path, (list, tuple)) else [path]:
+        p = str(Path(p).resolve())
+        if '*' in p:
+            files.extend(sorted(glob.glob(p, recursive=True)))  # glob
+        elif os.path.isdir(p):
+            files.extend(sorted(glob.glob(os.path.join(p, '*.*'))))  # dir
+        elif os.path.isfile(p):
+            files.append(p)  # files
+        else:
+            raise FileNotFoundError(f'{p} does not exist')
+    return files
+
+
+class VideoReader:
+    # Background video decoder with a bounded prefetch queue, i.e. ok, im0 = VideoReader('vid.mp4', vid_stride=2).read()
+    def __init__(self, path, vid_stride=1, backend='cv2', prefetch=4, seek_stride=30):
+        assert backend in ('cv2', 'pyav', 'ffmpeg'), f'invalid video backend {backend}, valid are cv2, pyav, ffmpeg'
+        if backend == 'pyav':
+            check_requirements('av')
+            import av  # noqa, fail here rather than in the decode thread
+        elif backend == 'ffmpeg':
+            assert shutil.which('ffmpeg'), 'ffmpeg not found on PATH, install it or use the cv2 video backend'
+        self.path = str(path)
+        self.vid_stride = vid_stride  # keep every vid_stride-th frame
+        self.backend = backend
+        self.seek = vid_stride >= seek_stride  # cv2 seeks to each kept frame instead of grabbing the skipped ones
+        self.queue = queue.Queue(max(prefetch, 1))  # decoded BGR frames, None at the end
+        self.stopped = Event()
+        self.thread = Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _cv2(self):
+        cap = cv2.VideoCapture(self.path)
+        n = 0  # next frame index
+        try:
+            while True:
+                if self.seek:
+                    n += self.vid_stride
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, n - 1)
+                    ok, im = cap.read()
+                else:
+                    for _ in range(self.vid_stride):
+                        cap.grab()
+                    ok, im = cap.retrieve()
+                if not ok:
+                    break
+                yield im
+        finally:
+            cap.release()
+
+    def _pyav(self):
+        # Threaded FFmpeg decode through PyAV, only kept frames are converted to BGR. Rotation metadata is not applied
+        import av
+        with av.open(self.path) as container:
+            stream = container.streams.video[0]
+            stream.thread_type = 'AUTO'  # frame and slice threading
+            for i, frame in enumerate(container.decode(stream)):
+                if (i + 1) % self.vid_stride == 0:
+                    yield frame.to_ndarray(format='bgr24')
+
+    def _ffmpeg(self):
+        # ffmpeg subprocess with hardware decode where available, frames selected by ffmpeg and piped as raw BGR
+        cap = cv2.VideoCapture(self.path)
+        ok, im = cap.read()  # frame shape after autorotation, as applied by ffmpeg too
+        cap.release()
+        if not ok:
+            return
+        h, w = im.shape[:2]
+        cmd = ['ffmpeg', '-loglevel', 'error', '-hwaccel', 'auto', '-i', self.path, '-an',
+               '-vf', f'select=not(mod(n+1\\,{self.vid_stride}))', '-vsync', '0',  # keep every vid_stride-th frame
+               '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-']
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        try:
+            while True:
+                b = bytearray(h * w * 3)  # writable frame buffer
+                view, n = memoryview(b), 0
+                while n < len(b):
+                    k = proc.stdout.readinto(view[n:])
+                    if not k:
+                        return
+                    n += k
+                yield np.frombuffer(b, dtype=np.uint8).reshape(h, w, 3)
+        finally:
+            proc.kill()
+            proc.wait()
+
+    def _run(self):
+        try:
+            for im in getattr(self, f'_{self.backend}')():
+                if not self._put(im):
+                    return
+        except Exception as e:
+            LOGGER.warning(f'WARNING ⚠️ {self.backend} video decode failed for {self.path}: {e}')
+        self._put(None)
+
+    def _put(self, x):
+        # Block until the queue has room or the reader is released, return False if released
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(x, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def read(self):
+        # Return (success, next kept BGR frame) like cv2.VideoCapture.read()
+        im = self.queue.get()
+        if im is None:
+            self.queue.put(None)  # stay exhausted
+        return im is not None, im
+
+    def release(self):
+        self.stopped.set()
+
+
 class LoadImages:
     # YOLOv5 image/video dataloader, i.e. `python detect.py --source image.jpg/vid.mp4`
-    def __init__(self, path, img_size=640, stride=32, auto=True, transforms=None, vid_stride=1):
-        files = []
-        for p in sorted(path) if isinstance(path, (list, tuple)) else [path]:
-            p = str(Path(p).resolve())
-            if '*' in p:
-                files.extend(sorted(glob.glob(p, recursive=True)))  # glob
-            elif os.path.isdir(p):
-                files.extend(sorted(glob.glob(os.path.join(p, '*.*'))))  # dir
-            elif os.path.isfile(p):
-                files.append(p)  # files
-            else:
-                raise FileNotFoundError(f'{p} does not exist')
-
+    def __init__(self, path, img_size=640, stride=32, auto=True, transforms=None, vid_stride=1, backend='cv2',
+                 prefetch=4):
+        files = source_files(path)
         images = [x for x in files if x.split('.')[-1].lower() in IMG_FORMATS]
         videos = [x for x in files if x.split('.')[-1].lower() in VID_FORMATS]
         ni, nv = len(images), len(videos)
@@ -213,11 +326,14 @@ class LoadImages:
         self.auto = auto
         self.transforms = transforms  # optional
         self.vid_stride = vid_stride  # video frame-rate stride
+        self.backend = backend  # video decoder, 'cv2', 'pyav' or 'ffmpeg'
+        self.prefetch = prefetch  # frames decoded ahead in a background thread, 0 to decode in __next__
+        self.reader = None
         if any(videos):
             self._new_video(videos[0])  # new video
         else:
             self.cap = None
-        assert self.nf > 0, f'No images or videos found in {p}. ' \
+        assert self.nf > 0, f'No images or videos found in {path}. ' \
                             f'Supported formats are:\nimages: {IMG_FORMATS}\nvideos: {VID_FORMATS}'
 
     def __iter__(self):
@@ -232,17 +348,22 @@ class LoadImages:
         if self.video_flag[self.count]:
             # Read video
             self.mode = 'video'
-            for _ in range(self.vid_stride):
-                self.cap.grab()
-            ret_val, im0 = self.cap.retrieve()
+            if self.reader:
+                ret_val, im0 = self.reader.read()  # decoded ahead in the background
+            else:
+                for _ in range(self.vid_stride):
+                    self.cap.grab()
+                ret_val, im0 = self.cap.retrieve()
             while not ret_val:
                 self.count += 1
                 self.cap.release()
+                if self.reader:
+                    self.reader.release()
                 if self.count == self.nf:  # last video
                     raise StopIteration
                 path = self.files[self.count]
                 self._new_video(path)
-                ret_val, im0 = self.cap.read()
+                ret_val, im0 = self.reader.read() if self.reader else self.cap.read()
 
             self.frame += 1
             # im0 = self._cv2_rotate(im0)  # for use if cv2 autorotation is False
@@ -270,6 +391,8 @@ class LoadImages:
         self.cap = cv2.VideoCapture(path)
         self.frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT) / self.vid_stride)
         self.orientation = int(self.cap.get(cv2.CAP_PROP_ORIENTATION_META))  # rotation degrees
+        if self.prefetch or self.backend != 'cv2':  # self.cap stays open for metadata, i.e. vid_cap.get(CAP_PROP_FPS)
+            self.reader = VideoReader(path, self.vid_stride, self.backend, self.prefetch)
         # self.cap.set(cv2.CAP_PROP_ORIENTATION_AUTO, 0)  # disable https://github.com/ultralytics/yolov5/issues/8493
 
     def _cv2_rotate(self, im):
@@ -286,20 +409,85 @@ class LoadImages:
         return self.nf  # number of files
 
 
+class LoadImageBatches:
+    # YOLOv5 batched image dataloader with multi-worker prefetch, i.e. `python detect.py --source dir/ --batch-size 16`
+    def __init__(self, path, img_size=640, stride=32, auto=True, transforms=None, batch_size=16, workers=NUM_THREADS):
+        self.files = [x for x in source_files(path) if x.split('.')[-1].lower() in IMG_FORMATS]
+        self.nf = len(self.files)  # number of images
+        assert self.nf > 0, f'No images found in {path}. Supported formats are:\nimages: {IMG_FORMATS}'
+        self.img_size = img_size
+        self.stride = stride
+        self.auto = auto
+        self.transforms = transforms  # optional
+        self.mode = 'image'
+        self.batch_size = batch_size  # maximum images per batch, batches hold images of one letterboxed shape
+        self.workers = max(min(workers, self.nf), 1)  # decode and letterbox threads
+        self.prefetch = 2 * max(batch_size, self.workers)  # images loading ahead
+
+    def load(self, path):
+        # Read and preprocess one image on a worker thread
+        im0 = cv2.imread(path)  # BGR
+        assert im0 is not None, f'Image Not Found {path}'
+        if self.transforms:
+            im = self.transforms(im0)  # transforms
+        else:
+            im = letterbox(im0, self.img_size, stride=self.stride, auto=self.auto)[0]  # padded resize
+            im = np.ascontiguousarray(im.transpose((2, 0, 1))[::-1])  # HWC to CHW, BGR to RGB, contiguous
+        return path, im, im0
+
+    def __iter__(self):
+        self.count = 0  # images yielded
+        return self._batches()
+
+    def _batches(self):
+        # Yield same-shape batches as they fill, the largest partial one if too many images are held, then the rest
+        buckets = {}  # letterboxed shape: [(path, im, im0), ...]
+        with ThreadPoolExecutor(self.workers) as pool:
+            files = iter(self.files)
+            pending = deque(pool.submit(self.load, f) for f in islice(files, self.prefetch))
+            while pending:
+                x = pending.popleft().result()
+                for f in islice(files, 1):
+                    pending.append(pool.submit(self.load, f))
+                shape = tuple(x[1].shape)
+                buckets.setdefault(shape, []).append(x)
+                if len(buckets[shape]) == self.batch_size:
+                    yield self._batch(buckets.pop(shape))
+                elif sum(len(b) for b in buckets.values()) > 4 * self.batch_size:  # many shapes, bound memory
+                    yield self._batch(buckets.pop(max(buckets, key=lambda k: len(buckets[k]))))
+        for b in buckets.values():
+            yield self._batch(b)
+
+    def _batch(self, b):
+        paths, ims, im0s = zip(*b)
+        self.count += len(b)
+        return list(paths), np.stack(ims), list(im0s), None, f'images {self.count}/{self.nf}: '
+
+    def __len__(self):
+        return self.nf  # number of files
+
+
 class LoadStreams:
     # YOLOv5 streamloader, i.e. `python detect.py --source 'rtsp://example.com/media.mp4'  # RTSP, RTMP, HTTP streams`
-    def __init__(self, sources='streams.txt', img_size=640, stride=32, auto=True, transforms=None, vid_stride=1):
+    def __init__(self, sources='streams.txt', img_size=640, stride=32, auto=True, transforms=None, vid_stride=1,
+                 skip=False):
         torch.backends.cudnn.benchmark = True  # faster for fixed-size inference
         self.mode = 'stream'
         self.img_size = img_size
         self.stride = stride
         self.vid_stride = vid_stride  # video frame-rate stride
+        self.skip = skip  # batch only streams with a new frame, else every stream once any has a new frame
         sources = Path(sources).read_text().rsplit() if Path(sources).is_file() else [sources]
         n = len(sources)
         self.sources = [clean_str(x) for x in sources]  # clean source names for later
         self.imgs, self.fps, self.frames, self.threads = [None] * n, [0] * n, [0] * n, [None] * n
+        self.latest = [None] * n  # newest (seq, timestamp, im0, im) per stream, replaced whole by capture threads
+        self.seq, self.seen = [0] * n, [0] * n  # last sequence number captured and yielded per stream
+        self.index, self.stamps = [], []  # stream index and capture time per batch item
+        self.new = Event()  # set by capture threads on every new frame
+        caps = [None] * n
         for i, s in enumerate(sources):  # index, source
-            # Start thread to read frames from video stream
+            # Open video stream
             st = f'{i + 1}/{n}: {s}... '
             if urlparse(s).hostname in ('www.youtube.com', 'youtube.com', 'youtu.be'):  # if source is YouTube video
                 check_requirements(('pafy', 'youtube_dl==2020.12.2'))
@@ -318,9 +506,8 @@ class LoadStreams:
             self.fps[i] = max((fps if math.isfinite(fps) else 0) % 100, 0) or 30  # 30 FPS fallback
 
             _, self.imgs[i] = cap.read()  # guarantee first frame
-            self.threads[i] = Thread(target=self.update, args=([i, cap, s]), daemon=True)
+            caps[i] = cap, s
             LOGGER.info(f"{st} Success ({self.frames[i]} frames {w}x{h} at {self.fps[i]:.2f} FPS)")
-            self.threads[i].start()
         LOGGER.info('')  # newline
 
         # check for common shapes
@@ -331,6 +518,12 @@ class LoadStreams:
         if not self.rect:
             LOGGER.warning('WARNING ⚠️ Stream shapes differ. For optimal performance supply similarly-shaped streams.')
 
+        # Start threads to read and preprocess frames, now that the letterbox shape is fixed
+        for i, (cap, s) in enumerate(caps):
+            self.put(i, self.imgs[i], time.monotonic())
+            self.threads[i] = Thread(target=self.update, args=([i, cap, s]), daemon=True)
+            self.threads[i].start()
+
     def update(self, i, cap, stream):
         # Read stream `i` frames in daemon thread
         n, f = 0, self.frames[i]  # frame number, frame array
@@ -338,34 +531,58 @@ class LoadStreams:
             n += 1
             cap.grab()  # .read() = .grab() followed by .retrieve()
             if n % self.vid_stride == 0:
+                t = time.monotonic()  # capture time
                 success, im = cap.retrieve()
                 if success:
-                    self.imgs[i] = im
+                    self.put(i, im, t)
                 else:
                     LOGGER.warning('WARNING ⚠️ Video stream unresponsive, please check your IP camera connection.')
-                    self.imgs[i] = np.zeros_like(self.imgs[i])
+                    self.put(i, np.zeros_like(self.imgs[i]), t)
                     cap.open(stream)  # re-open stream if signal was lost
             time.sleep(0.0)  # wait time
 
+    def put(self, i, im0, t):
+        # Preprocess frame im0 of stream `i` on its capture thread and publish it as the stream's newest frame
+        if self.transforms:
+            im = self.transforms(im0)  # transforms
+        else:
+            im = letterbox(im0, self.img_size, stride=self.stride, auto=self.auto)[0]  # resize, HWC BGR until batched
+        self.seq[i] += 1
+        self.latest[i] = self.seq[i], t, im0, im
+        self.imgs[i] = im0
+        self.new.set()
+
     def __iter__(self):
         self.count = -1
         return self
 
     def __next__(self):
         self.count += 1
-        if not all(x.is_alive() for x in self.threads) or cv2.waitKey(1) == ord('q'):  # q to quit
-            cv2.destroyAllWindows()
-            raise StopIteration
-
-        im0 = self.imgs.copy()
+        while True:  # wait for a new frame, never yield the same frames twice
+            if not all(x.is_alive() for x in self.threads) or cv2.waitKey(1) == ord('q'):  # q to quit
+                cv2.destroyAllWindows()
+                raise StopIteration
+            self.new.clear()
+            latest = list(self.latest)  # (seq, timestamp, im0, im) per stream
+            changed = [i for i, x in enumerate(latest) if x[0] > self.seen[i]]
+            if changed:
+                break
+            self.new.wait(0.1)
+
+        self.index = changed if self.skip else list(range(len(latest)))  # streams in this batch
+        for i in changed:
+            self.seen[i] = latest[i][0]
+        self.stamps = [latest[i][1] for i in self.index]
+        im0 = [latest[i][2] for i in self.index]
+        ims = [latest[i][3] for i in self.index]
         if self.transforms:
-            im = np.stack([self.transforms(x) for x in im0])  # transforms
-        else:
-            im = np.stack([letterbox(x, self.img_size, stride=self.stride, auto=self.auto)[0] for x in im0])  # resize
-            im = im[..., ::-1].transpose((0, 3, 1, 2))  # BGR to RGB, BHWC to BCHW
-            im = np.ascontiguousarray(im)  # contiguous
-
-        return self.sources, im, im0, None, ''
+            im = np.stack(ims)
+        else:  # HWC to CHW, BGR to RGB, written straight into the contiguous batch in one copy per frame
+            h, w, c = ims[0].shape
+            im = np.empty((len(ims), c, h, w), dtype=np.uint8)
+            for x, y in zip(ims, im):
+                np.copyto(y, x.transpose((2, 0, 1))[::-1])
+        return [self.sources[i] for i in self.index], im, im0, None, ''
 
     def __len__(self):
         return len(self.sources)  # 1E12 frames = 32 streams at 30 FPS for 30 years
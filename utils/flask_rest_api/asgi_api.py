@@ -0,0 +1,121 @@
+# YOLOv5 🚀 by Ultralytics, GPL-3.0 license
+"""
+Run an async (ASGI) REST and websocket API exposing one or more YOLOv5 models
+
+Usage:
+    $ python asgi_api.py --weights cards.pt --port 5000
+    $ curl -X POST -F image=@zidane.jpg 'http://localhost:5000/v1/object-detection/cards'  # multipart upload
+    $ curl -X POST --data-binary @zidane.jpg 'http://localhost:5000/v1/object-detection/cards'  # raw image body
+    websocket ws://localhost:5000/v1/stream/cards: JPEG frames in as binary messages, JSON records or error out
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from functools import partial
+from pathlib import Path
+
+import cv2
+import numpy as np
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocketDisconnect
+
+ROOT = Path(__file__).resolve().parents[2]  # YOLOv5 root directory
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))  # add ROOT to PATH
+
+from models.common import DetectMultiBackend
+from utils.general import check_img_size
+from utils.server import InferenceServer, det_json
+from utils.torch_utils import select_device
+
+models = {}  # name: InferenceServer
+
+
+def predict(model, b):
+    # Decode encoded image bytes without intermediate copies, infer and return JSON records bytes
+    im0 = cv2.imdecode(np.frombuffer(b, np.uint8), cv2.IMREAD_COLOR)  # BGR, read directly from the request buffer
+    assert im0 is not None, 'image could not be decoded'
+    return det_json(model.predict(im0), model.names)
+
+
+async def detect(request):
+    model = models.get(request.path_params['model'])
+    if model is None:
+        return JSONResponse({'error': f"unknown model, available models are {list(models)}"}, 404)
+    if request.headers.get('content-type', '').startswith('multipart/form-data'):
+        form = await request.form()  # streamed multipart parser
+        if 'image' not in form:
+            return JSONResponse({'error': "multipart body has no 'image' field"}, 400)
+        b = await form['image'].read()
+    else:
+        b = await request.body()  # raw image bytes
+    try:
+        y = await asyncio.get_running_loop().run_in_executor(None, partial(predict, model, b))
+    except AssertionError as e:
+        return JSONResponse({'error': str(e)}, 400)
+    return Response(y, media_type='application/json')
+
+
+async def stream(websocket):
+    # Live frames: binary JPEG messages in, JSON records out. Frames arriving during inference replace each other
+    model = models.get(websocket.path_params['model'])
+    await websocket.accept()
+    if model is None:
+        return await websocket.close(code=1008)
+    latest = asyncio.Queue(maxsize=1)
+
+    async def receive():
+        try:
+            while True:
+                b = await websocket.receive_bytes()
+                if latest.full():
+                    latest.get_nowait()  # drop the stale frame
+                latest.put_nowait(b)
+        except WebSocketDisconnect:
+            if latest.full():
+                latest.get_nowait()
+            latest.put_nowait(None)
+
+    task = asyncio.create_task(receive())
+    loop = asyncio.get_running_loop()
+    try:
+        b = await latest.get()
+        while b is not None:
+            try:
+                y = (await loop.run_in_executor(None, partial(predict, model, b))).decode()
+            except AssertionError as e:  # undecodable frame, report it and keep streaming
+                y = json.dumps({'error': str(e)})
+            await websocket.send_text(y)
+            b = await latest.get()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        task.cancel()
+
+
+app = Starlette(routes=[
+    Route('/v1/object-detection/{model}', detect, methods=['POST']),
+    WebSocketRoute('/v1/stream/{model}', stream)])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ASGI API exposing YOLOv5 model")
+    parser.add_argument("--port", default=5000, type=int, help="port number")
+    parser.add_argument('--weights', nargs='+', default=['yolov5s.pt'], help='model(s), served by file stem')
+    parser.add_argument('--imgsz', '--img', '--img-size', nargs='+', type=int, default=[640], help='inference size h,w')
+    parser.add_argument('--device', default='', help='cuda device, i.e. 0 or 0,1,2,3 or cpu')
+    parser.add_argument('--half', action='store_true', help='use FP16 half-precision inference')
+    opt = parser.parse_args()
+    opt.imgsz *= 2 if len(opt.imgsz) == 1 else 1  # expand
+
+    device = select_device(opt.device)
+    for w in opt.weights:
+        model = DetectMultiBackend(w, device=device, fp16=opt.half)
+        models[Path(w).stem] = InferenceServer(model, check_img_size(opt.imgsz, s=model.stride))
+
+    uvicorn.run(app, host="0.0.0.0", port=opt.port)
@@ -1,19 +1,31 @@
 # YOLOv5 🚀 by Ultralytics, GPL-3.0 license
 """
-Run a Flask REST API exposing one or more YOLOv5s models
+Run a Flask REST API exposing one or more YOLOv5s models, loaded here or held warm by a serve.py inference server
 """
 
 import argparse
 import io
+import json
+import sys
+from pathlib import Path
 
 import torch
 from flask import Flask, request
 from PIL import Image
 
+ROOT = Path(__file__).resolve().parents[2]  # YOLOv5 root directory
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))  # add ROOT to PATH
+
+from utils.batcher import MicroBatcher
+from utils.server import InferenceClient, det_json
+
 app = Flask(__name__)
 models = {}
+batchers = {}  # per-model request batching for locally loaded models
 
 DETECTION_URL = "/v1/object-detection/<model>"
+METRICS_URL = "/v1/metrics"
 
 
 @app.route(DETECTION_URL, methods=["POST"])
@@ -29,20 +41,46 @@ def predict(model):
         # Method 2
         im_file = request.files["image"]
         im_bytes = im_file.read()
+
+        if isinstance(models.get(model), InferenceClient):  # remote warmed model, image decoded by the server
+            client = models[model]
+            return det_json(client.predict(im_bytes), client.names)
+
         im = Image.open(io.BytesIO(im_bytes))
+        if model in batchers:
+            return batchers[model](im)  # batched with concurrent requests
+
+
+@app.route(METRICS_URL, methods=["GET"])
+def metrics():
+    return json.dumps({m: b.stats() for m, b in batchers.items()})
+
+
+def batch_predict(model, size=640):
+    # Return a function running one AutoShape batch on a list of PIL images, returning JSON records per image
+    def f(ims):
+        results = model(ims, size=size)  # reduce size=320 for faster inference
+        return [det_json(x, results.names) for x in results.xyxy]  # any Detections, i.e. upstream torch.hub models
 
-        if model in models:
-            results = models[model](im, size=640)  # reduce size=320 for faster inference
-            return results.pandas().xyxy[0].to_json(orient="records")
+    return f
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Flask API exposing YOLOv5 model")
     parser.add_argument("--port", default=5000, type=int, help="port number")
     parser.add_argument('--model', nargs='+', default=['yolov5s'], help='model(s) to run, i.e. --model yolov5n yolov5s')
+    parser.add_argument('--server', type=str, help='serve.py server address, i.e. http://127.0.0.1:8500')
+    parser.add_argument('--size', default=640, type=int, help='inference size (pixels)')
+    parser.add_argument('--max-batch', default=8, type=int, help='maximum images per batched forward pass')
+    parser.add_argument('--max-latency', default=10, type=float, help='maximum ms a request waits to fill a batch')
     opt = parser.parse_args()
+    assert not opt.server or len(opt.model) == 1, '--server serves one remote model, pass a single --model name'
 
     for m in opt.model:
-        models[m] = torch.hub.load("ultralytics/yolov5", m, force_reload=True, skip_validation=True)
+        if opt.server:
+            models[m] = InferenceClient(opt.server)
+        else:
+            models[m] = torch.hub.load("ultralytics/yolov5", m, force_reload=True, skip_validation=True)
+            batchers[m] = MicroBatcher(batch_predict(models[m], opt.size), opt.max_batch, opt.max_latency / 1E3)
 
-    app.run(host="0.0.0.0", port=opt.port)  # debug=True causes Restarting with stat
+    app.run(host="0.0.0.0", port=opt.port, threaded=True)  # debug=True causes Restarting with stat
@@ -216,6 +216,29 @@ def print_args(args: Optional[dict] = None, show_file=True, show_func=False):
     LOGGER.info(colorstr(s) + ', '.join(f'{k}={v}' for k, v in args.items()))
 
 
+def apply_preset(opt, parser, script=''):
+    # Apply a named preset (i.e. 'cards' for data/presets/cards.yaml) to argparse opt arguments left at their defaults
+    name = vars(opt).pop('preset', None)
+    if not name:
+        return opt
+    file = name if str(name).endswith(('.yaml', '.yml')) else ROOT / 'data' / 'presets' / f'{name}.yaml'
+    cfg = yaml_load(check_yaml(file))
+    values = {k: v for k, v in cfg.items() if not isinstance(v, dict)}  # common keys
+    values.update(cfg.get(script) or {})  # script section, i.e. 'detect', 'val', 'export'
+    for k, v in values.items():
+        default = parser.get_default(k)
+        if not hasattr(opt, k) or getattr(opt, k) != default:  # unknown argument or set on the command line
+            continue
+        if isinstance(default, list) != isinstance(v, list):  # i.e. imgsz 416 for nargs='+' arguments
+            v = [v] if isinstance(default, list) else v[0]
+        if isinstance(v, str) and (ROOT / v).exists():
+            v = ROOT / v  # repository-relative path
+        setattr(opt, k, v)
+    s = ', '.join(f'{k}={getattr(opt, k)}' for k in values if hasattr(opt, k))
+    LOGGER.info(f"{colorstr('preset: ')}{name} {s}")
+    return opt
+
+
 def init_seeds(seed=0, deterministic=False):
     # Initialize random number generator (RNG) seeds https://pytorch.org/docs/stable/notes/randomness.html
     random.seed(seed)
@@ -0,0 +1,68 @@
+# YOLOv5 🚀 by Ultralytics, GPL-3.0 license
+"""
+Scene-change gate that skips inference on frames matching the last inferred frame of their stream
+
+Usage:
+    from utils.motion import MotionGate
+    gate = MotionGate(area=0.002)
+    run = gate.check(im0s, keys)  # bool mask of frames to infer, BGR HWC images, keys i.e. stream indices
+    pred = gate.merge(model_and_nms(im[run]), run)  # fresh detections for changed frames, the last ones for the rest
+    print(gate)  # '1200/1500 frames skipped (80.0%)'
+"""
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    # Downscaled grayscale frame difference against the last inferred frame per stream
+    def __init__(self, area=0.002, diff=20, width=128, refresh=0):
+        self.area = area  # fraction of changed pixels that triggers inference
+        self.diff = diff  # grayscale difference (0-255) for a pixel to count as changed
+        self.width = width  # comparison width (pixels), height keeps the aspect ratio
+        self.refresh = refresh  # infer at least every refresh frames per stream, 0 to rely on changes only
+        self.ref, self.det, self.age = {}, {}, {}  # per source key: reference, detections, age
+        self.index, self.pending = [], []  # source key and downscaled frame of each frame in the last check()
+        self.frames = self.skipped = 0
+
+    def small(self, im):
+        # Return BGR image im downscaled to grayscale comparison size
+        h, w = im.shape[:2]
+        im = cv2.resize(im, (self.width, max(round(h * self.width / w), 1)), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(im, cv2.COLOR_BGR2GRAY)
+
+    def check(self, ims, index=None):
+        # Return a bool mask of the BGR frames ims that changed and need inference. index holds one key per frame
+        # naming its source, i.e. stream index or video path, default batch position. Frames are only compared by key
+        self.index = list(range(len(ims))) if index is None else list(index)
+        self.pending = [self.small(im) for im in ims]  # references once merge() confirms these frames were inferred
+        run = np.zeros(len(ims), dtype=bool)
+        for j, (i, x) in enumerate(zip(self.index, self.pending)):
+            ref = self.ref.get(i)
+            age = self.age.get(i, 0) + 1
+            if ref is None or ref.shape != x.shape or (self.refresh and age >= self.refresh) or \
+                    np.count_nonzero(cv2.absdiff(x, ref) > self.diff) > self.area * x.size:
+                run[j], age = True, 0
+            self.age[i] = age
+        self.frames += len(run)
+        self.skipped += len(run) - int(run.sum())
+        return run
+
+    def merge(self, pred, run, index=None, pending=None):
+        # Return detections per checked frame, pred holds the changed frames only or the full batch. index and pending
+        # default to the last check(), pipelines carry them with each item so frames dropped before inference never
+        # become references. Unchanged frames reuse their source's last detections, as copies as callers rescale them
+        index = self.index if index is None else index
+        pending = self.pending if pending is None else pending
+        if len(pred) != len(run):
+            it = iter(pred)
+            pred = [next(it) if r else None for r in run]
+        y = []
+        for i, r, det, x in zip(index, run, pred, pending):
+            if r:
+                self.ref[i], self.det[i] = x, det  # compare later frames with this inferred one, not the previous
+            y.append(self.det[i].clone())
+        return y
+
+    def __str__(self):
+        return f'{self.skipped}/{self.frames} frames skipped ({self.skipped / max(self.frames, 1):.1%})'
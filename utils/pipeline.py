@@ -0,0 +1,121 @@
+# YOLOv5 🚀 by Ultralytics, GPL-3.0 license
+"""
+Threaded multi-stage pipeline with bounded latest-wins queues
+
+Usage:
+    from utils.pipeline import Pipeline
+    pipe = Pipeline(dataset, [('preprocess', preprocess), ('inference', inference)], drop=True)
+    for y in pipe:  # last stage outputs, consumed on the calling thread, i.e. for cv2.imshow()
+        render(y)
+"""
+
+import contextlib
+import queue
+import threading
+import time
+
+from utils.general import LOGGER
+
+STOP = object()  # end of stream sentinel
+
+
+class LatestQueue(queue.Queue):
+    # Bounded queue. With drop=True put() never blocks and discards the oldest item when full (latest-item-wins)
+    def __init__(self, maxsize=1, drop=True, on_drop=None):
+        super().__init__(maxsize)
+        self.drop = drop
+        self.on_drop = on_drop  # called with each discarded item, i.e. to release its buffers
+        self.dropped = 0  # number of discarded items
+
+    def put(self, item, block=True, timeout=None):
+        while self.drop:
+            try:
+                return super().put(item, block=False)
+            except queue.Full:
+                with contextlib.suppress(queue.Empty):
+                    x = super().get(block=False)
+                    self.dropped += 1
+                    if self.on_drop:
+                        self.on_drop(x)
+        return super().put(item, block, timeout)
+
+
+class Pipeline:
+    # Run source iteration and each stage in its own thread, so stage i works on item N while stage i-1 works on N+1
+    def __init__(self, source, stages, maxsize=1, drop=False, on_drop=None, log_interval=10.0):
+        self.source = source  # iterable, i.e. dataset
+        self.names = ['capture'] + [name for name, _ in stages]
+        self.fns = [fn for _, fn in stages]
+        # stage i reads queues[i], the caller reads queues[-1]. Dropping frames only makes sense for live sources
+        self.queues = [LatestQueue(maxsize, drop, on_drop) for _ in range(len(stages) + 1)]  # on_drop(item) any stage
+        self.t = [0.0] * len(self.names)  # smoothed latency per stage (s)
+        self.log_interval = log_interval  # seconds between LOGGER stats reports, 0 to disable
+        self.error = None  # first exception raised in a worker thread
+        self.stopped = threading.Event()
+
+    def _time(self, i, t0):
+        # Update exponential moving average latency of stage i
+        dt = time.perf_counter() - t0
+        self.t[i] = dt if not self.t[i] else 0.9 * self.t[i] + 0.1 * dt
+
+    def _stop(self, q):
+        # Queue STOP behind the pending item instead of dropping it, so finite sources keep their last frames
+        while not self.stopped.is_set():
+            with contextlib.suppress(queue.Full):
+                return queue.Queue.put(q, STOP, timeout=0.1)
+        q.put(STOP)  # consumer gone, drop as usual
+
+    def _capture(self):
+        try:
+            it = iter(self.source)
+            while not self.stopped.is_set():
+                t0 = time.perf_counter()
+                x = next(it, STOP)
+                if x is STOP:
+                    break
+                self._time(0, t0)
+                self.queues[0].put(x)
+        except Exception as e:
+            self.error = self.error or e
+        self._stop(self.queues[0])
+
+    def _work(self, i):
+        fn, q_in, q_out = self.fns[i], self.queues[i], self.queues[i + 1]
+        try:
+            x = q_in.get()
+            while x is not STOP and not self.stopped.is_set():
+                t0 = time.perf_counter()
+                y = fn(x)
+                self._time(i + 1, t0)
+                q_out.put(y)
+                x = q_in.get()
+        except Exception as e:
+            self.error = self.error or e
+        self._stop(q_out)
+
+    def __iter__(self):
+        threads = [threading.Thread(target=self._capture, daemon=True)]
+        threads += [threading.Thread(target=self._work, args=(i,), daemon=True) for i in range(len(self.fns))]
+        for t in threads:
+            t.start()
+        t_log = time.time()
+        try:
+            y = self.queues[-1].get()
+            while y is not STOP:
+                yield y
+                if self.log_interval and time.time() - t_log > self.log_interval:
+                    LOGGER.info(f'Pipeline: {self}')
+                    t_log = time.time()
+                y = self.queues[-1].get()
+        finally:
+            self.stopped.set()
+        if self.error:
+            raise self.error
+
+    def __str__(self):
+        # Per-stage latency and input queue depth, i.e. 'capture 1.2ms, inference 40.1ms q=1/1 (12 dropped), ...'
+        s = [f'{self.names[0]} {self.t[0] * 1E3:.1f}ms']
+        for name, t, q in zip(self.names[1:] + ['output'], self.t[1:] + [None], self.queues):
+            s.append(f"{name}{f' {t * 1E3:.1f}ms' if t is not None else ''} q={q.qsize()}/{q.maxsize}"
+                     f'{f" ({q.dropped} dropped)" if q.dropped else ""}')
+        return ', '.join(s)
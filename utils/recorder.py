@@ -0,0 +1,74 @@
+# YOLOv5 🚀 by Ultralytics, GPL-3.0 license
+"""
+Compact binary recorder and reader for per-frame detections, for offline replay of the Tarneeb game logic
+
+Format:
+    b'TRNBDET1', uint32 header length, JSON header (i.e. {"names": [...], "trump": ["H"]})
+    per frame: FRAME record (table, n, t, h, w) followed by n float32 rows [x1, y1, x2, y2, conf, cls]
+
+Usage:
+    from utils.recorder import DetReader, DetRecorder
+    with DetRecorder('dets.trnb', names=model.names) as rec:
+        rec.write(det, t=time.monotonic(), table=0, shape=im0.shape)
+    for table, t, shape, det in DetReader('dets.trnb'):
+        game.update(det, t=t)
+"""
+
+import json
+import struct
+from pathlib import Path
+
+import numpy as np
+import torch
+
+MAGIC = b'TRNBDET1'
+FRAME = np.dtype([('table', '<u2'), ('n', '<u2'), ('h', '<u2'), ('w', '<u2'), ('t', '<f8')])  # 16-byte frame record
+
+
+class DetRecorder:
+    # Append per-frame det(n,6) tensors to a binary log. Usage: rec = DetRecorder('dets.trnb', names); rec.write(det)
+    def __init__(self, path, names=(), **meta):
+        names = list(names.values()) if isinstance(names, dict) else list(names)
+        header = json.dumps({'names': names, **meta}, default=str).encode()
+        self.path = Path(path)
+        self.f = open(self.path, 'wb')
+        self.f.write(MAGIC + struct.pack('<I', len(header)) + header)
+        self.frames = 0  # frames written
+
+    def write(self, det, t=0.0, table=0, shape=(0, 0)):
+        # Write one frame of detections det(n,6) = [xyxy, conf, cls] seen at time t (s) in an image of shape (h, w)
+        det = det.cpu().numpy() if isinstance(det, torch.Tensor) else np.asarray(det)
+        det = np.ascontiguousarray(det[:, :6], dtype='<f4')
+        self.f.write(np.array((table, len(det), shape[0], shape[1], t), dtype=FRAME).tobytes())
+        self.f.write(det.tobytes())
+        self.frames += 1
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class DetReader:
+    # Iterate a DetRecorder log as (table, t, (h, w), det(n,6) numpy). Usage: for table, t, shape, det in DetReader(f):
+    def __init__(self, path):
+        self.path = Path(path)
+        self.buf = self.path.read_bytes()  # whole log in memory, frames are zero-copy views
+        assert self.buf[:len(MAGIC)] == MAGIC, f'{path} is not a detection log'
+        n = struct.unpack_from('<I', self.buf, len(MAGIC))[0]
+        self.offset = len(MAGIC) + 4 + n  # first frame
+        self.meta = json.loads(self.buf[len(MAGIC) + 4:self.offset])  # header, i.e. names, trump
+        self.names = self.meta['names']
+
+    def __iter__(self):
+        buf, i = self.buf, self.offset
+        while i < len(buf):
+            f = np.frombuffer(buf, FRAME, 1, i)[0]
+            i += FRAME.itemsize
+            det = np.frombuffer(buf, '<f4', int(f['n']) * 6, i).reshape(-1, 6)
+            i += det.nbytes
+            yield int(f['table']), float(f['t']), (int(f['h']), int(f['w'])), det
@@ -0,0 +1,229 @@
+# YOLOv5 🚀 by Ultralytics, GPL-3.0 license
+"""
+Persistent local inference server holding one warmed model, and its thin client
+
+Endpoints:
+    GET  /info     model names, stride, pt and imgsz as JSON
+    POST /predict  encoded image (jpg, png...) or .npy BGR HWC array, returns .npy det(n,6) in image pixels
+    POST /infer    .npy letterboxed RGB uint8 (3,h,w) or (b,3,h,w) array, returns .npy (n,7) [image, xyxy, conf, cls]
+    Query parameters conf_thres, iou_thres, max_det, classes (i.e. 0,2,3) and agnostic override server defaults
+
+Usage:
+    from utils.server import InferenceClient
+    client = InferenceClient('http://127.0.0.1:8500')  # or 'unix:///tmp/yolov5.sock', server started by serve.py
+    det = client.predict(cv2.imread('im.jpg'))  # det(n,6) = [xyxy, conf, cls]
+"""
+
+import contextlib
+import http.client
+import io
+import json
+import socket
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import cv2
+import numpy as np
+import torch
+
+from utils.augmentations import letterbox
+from utils.general import LOGGER, colorstr, non_max_suppression, scale_coords
+from utils.torch_utils import smart_inference_mode
+
+ADDRESS = 'http://127.0.0.1:8500'  # default server address
+NPY = 'application/x-npy'
+
+
+def npy_bytes(x):
+    # Serialize numpy array x to .npy bytes
+    b = io.BytesIO()
+    np.save(b, x, allow_pickle=False)
+    return b.getvalue()
+
+
+def npy_load(b):
+    # Deserialize .npy bytes
+    return np.load(io.BytesIO(b), allow_pickle=False)
+
+
+def det_json(det, names):
+    # Return det(n,6) = [xyxy, conf, cls] as JSON records bytes, same fields as Detections.pandas().xyxy without pandas
+    det = det.tolist() if hasattr(det, 'tolist') else det
+    return json.dumps([{'xmin': x[0], 'ymin': x[1], 'xmax': x[2], 'ymax': x[3], 'confidence': x[4], 'class': int(x[5]),
+                        'name': names[int(x[5])]} for x in det], separators=(',', ':')).encode()
+
+
+class InferenceServer:
+    # Warmed model shared by all requests. Usage: InferenceServer(model, imgsz=(640, 640)).serve(ADDRESS)
+    def __init__(self, model, imgsz=(640, 640), conf_thres=0.25, iou_thres=0.45, max_det=1000):
+        self.model = model  # DetectMultiBackend
+        self.imgsz = list(imgsz)  # inference size (h, w) for /predict
+        self.stride, self.pt = int(model.stride), bool(model.pt)  # same attributes as InferenceClient
+        self.defaults = {'conf_thres': conf_thres, 'iou_thres': iou_thres, 'max_det': max_det}
+        self.lock = threading.Lock()  # one forward pass at a time
+        names = model.names
+        self.names = [names[i] for i in sorted(names)] if isinstance(names, dict) else list(names)
+        model.warmup(imgsz=(1, 3, *self.imgsz))
+
+    def info(self):
+        return {'names': self.names, 'stride': self.stride, 'pt': self.pt, 'imgsz': self.imgsz}
+
+    @smart_inference_mode()
+    def infer(self, im, conf_thres=None, iou_thres=None, classes=None, agnostic=False, max_det=None):
+        # Inference and NMS on letterboxed RGB uint8 im(3,h,w) or (b,3,h,w), return list of det(n,6) numpy per image
+        kw = {k: self.defaults[k] if v is None else v for k, v in
+              (('conf_thres', conf_thres), ('iou_thres', iou_thres), ('max_det', max_det))}
+        im = torch.from_numpy(im).to(self.model.device)
+        im = im.half() if self.model.fp16 else im.float()  # uint8 to fp16/32
+        im /= 255  # 0 - 255 to 0.0 - 1.0
+        if len(im.shape) == 3:
+            im = im[None]  # expand for batch dim
+        with self.lock:
+            pred = self.model(im)
+        pred = non_max_suppression(pred, classes=classes, agnostic=agnostic, **kw)
+        return [x.cpu().float().numpy() for x in pred]
+
+    def predict(self, im0, **kwargs):
+        # Letterbox, infer and rescale one BGR HWC image im0, return det(n,6) numpy in im0 pixels
+        im = letterbox(im0, self.imgsz, stride=self.stride, auto=self.pt)[0]  # padded resize
+        im = np.ascontiguousarray(im.transpose((2, 0, 1))[::-1])  # HWC to CHW, BGR to RGB
+        det = self.infer(im, **kwargs)[0]
+        det[:, :4] = scale_coords(im.shape[1:], det[:, :4], im0.shape).round()
+        return det
+
+    def serve(self, address=ADDRESS):
+        # Serve requests until interrupted, address is 'http://host:port' or 'unix:///path.sock'
+        url = urlparse(address)
+        if url.scheme == 'unix':
+            with contextlib.suppress(FileNotFoundError):
+                Path(url.path).unlink()  # stale socket from a previous run
+            httpd = _UnixHTTPServer(url.path, _Handler)
+        else:
+            httpd = _HTTPServer((url.hostname or '127.0.0.1', url.port or 8500), _Handler)
+        httpd.app = self
+        LOGGER.info(f"{colorstr('server: ')}serving {len(self.names)}-class model at {address}, CTRL+C to stop")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            httpd.server_close()
+            if url.scheme == 'unix':
+                with contextlib.suppress(FileNotFoundError):
+                    Path(url.path).unlink()
+
+
+class _HTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, getattr(socketserver, 'UnixStreamServer', HTTPServer)):
+    daemon_threads = True  # Unix sockets are unavailable on Windows
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, clients reuse one connection
+    server_version = 'YOLOv5'
+
+    def do_GET(self):
+        if urlparse(self.path).path != '/info':
+            return self.send_error(404)
+        self.reply(json.dumps(self.server.app.info()).encode(), 'application/json')
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        q = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        kw = {k: t(q[k]) for k, t in (('conf_thres', float), ('iou_thres', float), ('max_det', int)) if k in q}
+        kw['classes'] = [int(x) for x in q['classes'].split(',')] if q.get('classes') else None
+        kw['agnostic'] = q.get('agnostic', '').lower() in ('1', 'true')
+        try:
+            if url.path == '/infer':
+                pred = self.server.app.infer(npy_load(body), **kw)
+                y = np.concatenate([np.insert(x, 0, i, axis=1) for i, x in enumerate(pred)])  # image index column
+            elif url.path == '/predict':
+                if self.headers.get('Content-Type') == NPY:
+                    im0 = npy_load(body)
+                else:
+                    im0 = cv2.imdecode(np.frombuffer(body, np.uint8), cv2.IMREAD_COLOR)
+                    assert im0 is not None, 'image could not be decoded'
+                y = self.server.app.predict(im0, **kw)
+            else:
+                return self.send_error(404)
+        except Exception as e:
+            return self.send_error(400, str(e))
+        self.reply(npy_bytes(y.astype(np.float32)), NPY)
+
+    def reply(self, b, content_type):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(b)))
+        self.end_headers()
+        self.wfile.write(b)
+
+    def log_message(self, format, *args):
+        pass  # no per-request logging
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=30):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class InferenceClient:
+    # Thin client for InferenceServer. Usage: client = InferenceClient(ADDRESS); det = client.predict(im0)
+    def __init__(self, address=ADDRESS, timeout=30):
+        url = urlparse(address)
+        self.address = address
+        self.connect = (lambda: _UnixHTTPConnection(url.path, timeout)) if url.scheme == 'unix' else \
+            (lambda: http.client.HTTPConnection(url.hostname or '127.0.0.1', url.port or 8500, timeout=timeout))
+        self.local = threading.local()  # one keep-alive connection per thread
+        info = json.loads(self.request('GET', '/info'))
+        self.names = dict(enumerate(info['names']))  # class names
+        self.stride, self.pt, self.imgsz = info['stride'], info['pt'], info['imgsz']
+        self.fp16 = False  # inputs are sent as uint8
+
+    def request(self, method, path, body=None, content_type=NPY, **params):
+        # Send one request on this thread's connection, reconnecting once if the server closed it
+        params = {k: (','.join(map(str, v)) if isinstance(v, (list, tuple)) else v) for k, v in params.items()
+                  if v is not None}
+        path += f'?{urlencode(params)}' if params else ''
+        for retry in (True, False):
+            conn = getattr(self.local, 'conn', None) or self.connect()
+            self.local.conn = conn
+            try:
+                conn.request(method, path, body, {'Content-Type': content_type} if body is not None else {})
+                r = conn.getresponse()
+                b = r.read()
+                break
+            except (ConnectionError, http.client.HTTPException):
+                conn.close()
+                self.local.conn = None
+                if not retry:
+                    raise
+        assert r.status == 200, f'{self.address}{path}: {r.status} {r.reason}'
+        return b
+
+    def infer(self, im, conf_thres=None, iou_thres=None, classes=None, agnostic=False, max_det=None):
+        # Remote inference and NMS on letterboxed RGB uint8 im(3,h,w) or (b,3,h,w), return list of det(n,6) tensors
+        im = np.asarray(im, dtype=np.uint8)
+        b = self.request('POST', '/infer', npy_bytes(im), conf_thres=conf_thres, iou_thres=iou_thres,
+                         classes=classes, agnostic=int(agnostic), max_det=max_det)
+        y = torch.from_numpy(npy_load(b))
+        return [y[y[:, 0] == i, 1:] for i in range(1 if im.ndim == 3 else len(im))]
+
+    def predict(self, im, **kwargs):
+        # Remote inference on a BGR HWC image array, image file path or encoded image bytes, return det(n,6) numpy
+        if isinstance(im, (str, Path)):
+            im = Path(im).read_bytes()
+        body, content_type = (npy_bytes(im), NPY) if isinstance(im, np.ndarray) else (bytes(im), 'image/*')
+        return npy_load(self.request('POST', '/predict', body, content_type, **kwargs))
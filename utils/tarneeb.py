@@ -0,0 +1,376 @@
+# YOLOv5 🚀 by Ultralytics, GPL-3.0 license
+"""
+Tarneeb game logic driven directly by detection tensors
+
+Usage:
+    from utils.tarneeb import TarneebSession
+    game = TarneebSession(model.names, trump='H', log='game.jsonl')  # or log='-' for stdout, 'tcp://host:port'
+    game.bid(player=0, tricks=7)
+    for det in pred:
+        played = game.update(det)  # det(n,6) = [xyxy, conf, cls]
+"""
+
+import json
+import socket
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+
+from utils.augmentations import letterbox
+from utils.cards import SUITS, get_cards
+from utils.general import yaml_load
+
+SEATS = 'First', 'Second', 'Third', 'Fourth'  # players in order of play
+TRICKS = 13  # tricks per round
+
+
+def parse_suit(suit):
+    # Return suit index for 'S', 'spades', 'Hearts', 2 etc.
+    if isinstance(suit, int):
+        assert 0 <= suit < len(SUITS), f'invalid suit index {suit}'
+        return suit
+    s = str(suit).strip()[:1].upper()
+    assert s in SUITS, f'invalid suit {suit!r}, valid suits are {SUITS}'
+    return SUITS.index(s)
+
+
+def open_log(log):
+    # Return a line-buffered text stream for an event log: '-' for stdout, 'tcp://host:port' for a socket, else a file
+    log = str(log)
+    if log == '-':
+        return sys.stdout
+    if log.startswith('tcp://'):
+        host, port = log[6:].rsplit(':', 1)
+        return socket.create_connection((host, int(port))).makefile('w', buffering=1)
+    return open(log, 'a')
+
+
+class CardDwell:
+    # Per-class presence tracker on a monotonic clock. Usage: dwell = CardDwell(nc); ready = dwell.update(cls, conf)
+    def __init__(self, nc, dwell=2.0, grace=0.5, frames=0, conf_on=0.5, conf_off=0.25, clock=time.monotonic):
+        self.dwell = dwell  # seconds a class must stay present before it is confirmed
+        self.grace = grace  # seconds a class may drop out without resetting its dwell timer
+        self.frames = frames  # optional frame-count fallback, confirm after this many frames present (0 to disable)
+        self.conf_on, self.conf_off = conf_on, conf_off  # confidence to start tracking, confidence to stay tracked
+        self.clock = clock
+        self.start = np.zeros(nc)  # dwell start time per class
+        self.last = np.full(nc, -np.inf)  # last seen time per class
+        self.count = np.zeros(nc, dtype=np.int32)  # frames present per class
+
+    def update(self, cls, conf, t=None):
+        # Update with one frame of class ids and confidences seen at time t, return confirmed class ids oldest first
+        t = self.clock() if t is None else t
+        alive = (t - self.last[cls]) <= self.grace  # hysteresis, tracked classes stay alive at the lower threshold
+        cls = np.unique(cls[conf >= np.where(alive, self.conf_off, self.conf_on)])
+        new = cls[(t - self.last[cls]) > self.grace]  # (re)appeared after more than grace seconds
+        self.start[new], self.count[new] = t, 0
+        self.last[cls] = t
+        self.count[cls] += 1
+        ready = (t - self.start[cls] >= self.dwell) | ((self.frames > 0) & (self.count[cls] >= self.frames))
+        ready = cls[ready]
+        return ready[np.argsort(self.start[ready], kind='stable')]
+
+    def reset(self, cls=None):
+        # Forget all classes, or only class ids cls
+        cls = slice(None) if cls is None else cls
+        self.last[cls], self.count[cls] = -np.inf, 0
+
+
+class TarneebTrick:
+    # Tarneeb single-trick state machine. Usage: trick = TarneebTrick(names, trump='H'); trick.update(det)
+    def __init__(self, names, trump='S', conf_thres=0.25, dwell=2.0, grace=0.5, frames=0):
+        self.names = names  # class names
+        cards = get_cards(names)
+        self.rank, self.suit = cards.rank, cards.suit  # class id to rank/suit index lookups
+        self.trump = parse_suit(trump)  # trump suit index
+        self.conf_thres = conf_thres  # minimum detection confidence, cards must reach 0.5 to start their dwell timer
+        self.tracker = CardDwell(len(self.rank), dwell, grace, frames, max(conf_thres, 0.5), conf_thres)
+        self.reset()
+
+    def reset(self, played=None):
+        # Start a new trick, keeping trump, thresholds and lookup tables. Pass played to share a hand-level played mask
+        self.cards = []  # class ids in order of play
+        self.seats = []  # seat index of each card, seat 0 leads
+        self.lead = -1  # led suit index
+        self.winner = -1  # winning seat index
+        self.best = -1  # winning card score
+        self.played = np.zeros(len(self.rank), dtype=bool) if played is None else played  # played mask by class id
+        self.tracker.reset()
+
+    @property
+    def done(self):
+        return len(self.cards) == len(SEATS)
+
+    def score(self, c):
+        # Card strength within this trick: trump 26-38 > led suit 13-25 > discard 0-12
+        s = self.suit[c]
+        return int(self.rank[c]) + (26 if s == self.trump else 13 if s == self.lead else 0)
+
+    def play(self, c, seat=None):
+        # Play class id c for seat (default next seat in order of play) and return the winning seat index
+        assert not self.done, 'trick is complete, call reset() first'
+        assert self.rank[c] >= 0, f'class {c} is not a playing card'
+        seat = len(self.cards) if seat is None else int(seat)
+        assert seat not in self.seats, f'seat {seat} has already played'
+        self.cards.append(int(c))
+        self.seats.append(seat)
+        self.played[c] = True
+        self.lead = self.suit[self.cards[self.seats.index(0)] if 0 in self.seats else self.cards[0]]
+        scores = [self.score(x) for x in self.cards]  # rescored as the lead card may arrive late by location
+        j = int(np.argmax(scores))
+        self.best, self.winner = scores[j], self.seats[j]
+        return self.winner
+
+    def update(self, det, t=None, seats=None):
+        # Update with one frame of detections det(n,6) = [xyxy, conf, cls] seen at time t (s), return played class ids.
+        # Optional seats(n) assigns each detection to a seat by location (-1 for none), else seats follow order of play
+        if self.done:
+            return []
+        det = det.cpu().numpy() if isinstance(det, torch.Tensor) else np.asarray(det)
+        cls, conf = det[:, 5].astype(int), det[:, 4]
+        i = (self.rank[cls] >= 0) & ~self.played[cls]  # unplayed cards only, i.e. no Joker or backcard
+        if seats is None:
+            ready = self.tracker.update(cls[i], conf[i], t)[:len(SEATS) - len(self.cards)]  # longest dwell first
+            for c in ready:
+                self.play(c)
+            return ready.tolist()
+
+        seats = np.asarray(seats)
+        i &= (seats >= 0) & ~np.isin(seats, self.seats)  # cards in the play area of a seat that has not played
+        cls, conf, seats = cls[i], conf[i], seats[i]
+        played = []
+        for c in self.tracker.update(cls, conf, t):
+            j = cls == c
+            seat = seats[j][conf[j].argmax()]
+            if seat not in self.seats:
+                self.play(c, seat)
+                played.append(int(c))
+        return played
+
+    def by_seat(self):
+        # Return class ids played by each seat, -1 if not yet played
+        cards = [-1] * len(SEATS)
+        for c, seat in zip(self.cards, self.seats):
+            cards[seat] = c
+        return cards
+
+    def label(self, i):
+        # Return class name of the card played by seat i, or '' if not yet played
+        return self.names[self.cards[self.seats.index(i)]] if i in self.seats else ''
+
+    def __str__(self):
+        s = ', '.join(f'{SEATS[i]}: {self.label(i)}' for i in sorted(self.seats))
+        return f"{s}{', ' if s else ''}winner: {SEATS[self.winner] if self.winner >= 0 else '__'}"
+
+
+class TarneebSession:
+    # Tarneeb game of 13-trick rounds, bids and team scores. Usage: game = TarneebSession(names); game.update(det)
+    def __init__(self, names, trump='S', target=41, log=None, table=0, **kwargs):
+        self.trick = TarneebTrick(names, trump, **kwargs)  # current trick
+        self.played = self.trick.played  # hand-level played mask, shared with every trick of the round
+        self.target = target  # score that wins the game
+        self.table = table  # table id for event log
+        self.log = open_log(log) if isinstance(log, (str, Path)) else log  # event log, i.e. 'game.jsonl', '-' or socket
+        self.scores = [0, 0]  # game scores, team 0 = players 0 and 2, team 1 = players 1 and 3
+        self.round = 0
+        self.leader = 0  # player leading the current trick
+        self.last = [-1] * len(SEATS), -1  # last completed trick (class id per seat, winning seat) for display
+        self.held = {}  # class id: last seen time, final trick cards of the previous round still on the table
+        self.new_round()
+
+    def new_round(self, held=()):
+        # Start a new round of 13 tricks, keeping game scores and trump. Cards held (i.e. the final trick) stay played
+        # until they leave view or the next bid, so they are not confirmed again as the first trick
+        self.tricks = [0, 0]  # tricks won this round per team
+        self.bidder, self.contract = -1, 0  # no contract until bid()
+        self.played[:] = False
+        self.held = dict.fromkeys(int(c) for c in held if c >= 0)  # not seen yet
+        self.played[list(self.held)] = True
+        self.trick.reset(self.played)
+
+    def release(self, det=None, t=None):
+        # Unmask held cards absent from detections det(n,6) for over grace seconds at time t, or all if det is None
+        if det is None:
+            self.played[list(self.held)] = False
+            self.held = {}
+            return
+        tracker = self.trick.tracker
+        t = tracker.clock() if t is None else t
+        det = det.cpu().numpy() if isinstance(det, torch.Tensor) else np.asarray(det)
+        seen = set(det[det[:, 4] >= self.trick.conf_thres, 5].astype(int).tolist())
+        for c, last in list(self.held.items()):
+            if c in seen or last is None:
+                self.held[c] = t
+            elif t - last > tracker.grace:  # left view
+                self.played[c] = False
+                del self.held[c]
+
+    def bid(self, player=0, tricks=7, trump=None):
+        # Set the round contract: player's team must win tricks (7-13) with optional new trump suit
+        assert 7 <= tricks <= TRICKS, f'invalid bid {tricks}, valid bids are 7-{TRICKS}'
+        self.bidder, self.contract = player % 4, tricks
+        self.release()  # new deal, the previous round's cards are gone
+        if trump is not None:
+            self.trick.trump = parse_suit(trump)
+        if not any(self.tricks) and not self.trick.cards:
+            self.leader = self.bidder  # bidder leads the first trick
+        self.emit('bid', player=self.bidder, tricks=tricks, trump=SUITS[self.trick.trump])
+
+    def set_trump(self, suit):
+        # Set trump suit, takes effect on the current trick
+        self.trick.trump = parse_suit(suit)
+        self.emit('trump', trump=SUITS[self.trick.trump])
+
+    def update(self, det, t=None, seats=None):
+        # Update with one frame of detections det(n,6) = [xyxy, conf, cls] and optional player index per detection
+        # seats(n) from TarneebSeats, return played class ids
+        n = len(self.trick.cards)
+        if self.held:
+            self.release(det, t)
+        if seats is not None:
+            seats = np.where(np.asarray(seats) >= 0, (np.asarray(seats) - self.leader) % 4, -1)  # player to seat
+        played = self.trick.update(det, t, seats)
+        for c, k in zip(played, self.trick.seats[n:]):
+            self.emit('card', player=(self.leader + k) % 4, card=self.trick.names[c])
+        if self.trick.done:
+            self.end_trick()
+        return played
+
+    def end_trick(self):
+        # Score the completed trick, the winner leads the next one
+        winner = (self.leader + self.trick.winner) % 4
+        self.tricks[winner % 2] += 1
+        self.last, self.leader = (self.trick.by_seat(), self.trick.winner), winner
+        self.emit('trick', player=winner, cards=[self.trick.label(i) for i in range(len(SEATS))])  # leader first
+        self.trick.reset(self.played)
+        if sum(self.tricks) == TRICKS:
+            self.end_round()
+
+    def end_round(self):
+        # Score the round: a made contract scores its tricks, a failed one loses the bid and opponents score theirs
+        gain = list(self.tricks)  # no contract, both teams score their tricks
+        if self.bidder >= 0:
+            b = self.bidder % 2
+            made = self.tricks[b] >= self.contract
+            gain[b], gain[1 - b] = (self.tricks[b], 0) if made else (-self.contract, self.tricks[1 - b])
+        self.scores = [x + y for x, y in zip(self.scores, gain)]
+        self.emit('round', tricks=self.tricks, scores=self.scores)
+        if max(self.scores) >= self.target:
+            self.emit('game', team=int(self.scores[1] > self.scores[0]), scores=self.scores)
+            self.scores = [0, 0]
+        self.round += 1
+        self.new_round(held=self.last[0])  # final trick cards are still on the table
+
+    def view(self):
+        # Return a display snapshot: class id per seat and winning seat of the current (or last completed) trick, score
+        cards, winner = (self.trick.by_seat(), self.trick.winner) if self.trick.cards else self.last
+        return list(cards), winner, str(self)
+
+    def emit(self, event, **kwargs):
+        # Append one compact JSON line to the event log
+        if self.log:
+            e = {'t': round(time.time(), 3), 'table': self.table, 'round': self.round, 'trick': sum(self.tricks)}
+            self.log.write(json.dumps({**e, 'event': event, **kwargs}, separators=(',', ':')) + '\n')
+            self.log.flush()
+
+    def __str__(self):
+        return f'Round {self.round} tricks {self.tricks[0]}:{self.tricks[1]} score {self.scores[0]}:{self.scores[1]}'
+
+
+def draw_trick(im, names, cards, winner, score, font=cv2.FONT_HERSHEY_TRIPLEX, thick=3, color=(255, 255, 255)):
+    # Draw a TarneebSession.view() snapshot, the winner, card per seat and score, onto BGR image im in place
+    cv2.rectangle(im, (50, 25), (400, 100), (0, 0, 0), -1)
+    cv2.putText(im, f"Winner IS: {SEATS[winner] if winner >= 0 else '__'}", (80, 70), font, 1, color, thick, cv2.LINE_4)
+    for j, card in enumerate(cards):
+        if card >= 0:
+            cv2.putText(im, f"{SEATS[j]} Player: {names[card]}", (70, 150 + 50 * j), font, 1, color, thick, cv2.LINE_4)
+    cv2.putText(im, score, (70, 350), font, 1, color, thick, cv2.LINE_4)
+    return im
+
+
+class TarneebTables:
+    # Independent Tarneeb games for a batch of streams. Usage: tables = TarneebTables(names, ('H', 'S'))
+    def __init__(self, names, trump='S', n=1, log=None, **kwargs):
+        if isinstance(trump, (list, tuple)) and len(trump) == 1:
+            trump = trump[0]
+        if str(trump).endswith(('.yaml', '.yml')):
+            trump = yaml_load(trump)['trump']  # i.e. trump: [H, S, D]
+        trump = [trump] if isinstance(trump, (str, int)) else list(trump)
+        n = max(n, len(trump))
+        trump = trump * n if len(trump) == 1 else trump
+        assert len(trump) == n, f'{len(trump)} trump suits given for {n} tables'
+        self.file = isinstance(log, (str, Path)) and str(log) != '-'  # log opened here, close() closes it
+        self.log = open_log(log) if isinstance(log, (str, Path)) else log  # event log shared by all tables
+        self.tables = [TarneebSession(names, x, log=self.log, table=i, **kwargs) for i, x in enumerate(trump)]
+
+    def set_trump(self, i, suit):
+        # Set trump suit of table i, takes effect on its current trick
+        self.tables[i].set_trump(suit)
+
+    def update(self, pred, t=None, seats=None):
+        # Update every table with its own detections pred[i] and optional seats[i], return played class ids per table
+        seats = [None] * len(self.tables) if seats is None else seats
+        return [table.update(det, t, s) for table, det, s in zip(self.tables, pred, seats)]
+
+    def close(self):
+        if self.file:
+            self.log.close()
+
+    def __getitem__(self, i):
+        return self.tables[i]
+
+    def __len__(self):
+        return len(self.tables)
+
+
+class TarneebSeats:
+    # Play area polygons of a fixed table layout, one per player. Usage: seats = TarneebSeats('data/seats.yaml')
+    def __init__(self, seats, crop=False, margin=0.02):
+        if str(seats).endswith(('.yaml', '.yml')):
+            cfg = yaml_load(seats)  # i.e. seats: [[[x, y], ...], ...], crop: true
+            seats, crop, margin = cfg['seats'], cfg.get('crop', crop), cfg.get('margin', margin)
+        self.polygons = [np.asarray(p, dtype=np.float32).reshape(-1, 2) for p in seats]  # xy vertices per player
+        assert len(self.polygons) == len(SEATS), f'{len(self.polygons)} seat polygons given, {len(SEATS)} required'
+        self.normalized = max(p.max() for p in self.polygons) <= 1  # normalized xy or pixels
+        self.crop = crop  # run inference on the bounding box of all play areas only
+        self.margin = margin  # crop margin, fraction of image size
+
+    def scale(self, shape):
+        # Return polygons in pixels for an image of shape (h, w)
+        return [p * (shape[1], shape[0]) for p in self.polygons] if self.normalized else self.polygons
+
+    def roi(self, shape):
+        # Return integer crop box x1, y1, x2, y2 around all play areas in an image of shape (h, w), or the full image
+        h, w = shape[:2]
+        if not self.crop:
+            return 0, 0, w, h
+        xy = np.concatenate(self.scale(shape))
+        m = self.margin * max(h, w)
+        x1, y1 = (xy.min(0) - m).clip(0).astype(int)
+        x2, y2 = np.ceil(xy.max(0) + m).astype(int).clip(None, (w, h))
+        return int(x1), int(y1), int(x2), int(y2)
+
+    def transform(self, img_size=640, stride=32, auto=True):
+        # Return a dataloader transform that crops to roi() before letterboxing, for LoadImages/LoadStreams transforms
+        def f(im0):
+            x1, y1, x2, y2 = self.roi(im0.shape)
+            im = letterbox(im0[y1:y2, x1:x2], img_size, stride=stride, auto=auto)[0]  # padded resize
+            return np.ascontiguousarray(im.transpose((2, 0, 1))[::-1])  # HWC to CHW, BGR to RGB
+
+        return f
+
+    def __call__(self, det, shape):
+        # Return player index of each detection det(n,6) by box centre in an image of shape (h, w), -1 outside all seats
+        det = det.cpu().numpy() if isinstance(det, torch.Tensor) else np.asarray(det)
+        x, y = [(det[:, i:i + 1] + det[:, i + 2:i + 3]) / 2 for i in (0, 1)]  # box centres (n,1)
+        seat = np.full(len(det), -1)
+        for i, p in reversed(list(enumerate(self.scale(shape)))):  # lowest index wins on overlap
+            (x1, y1), (x2, y2) = p.T, np.roll(p, -1, 0).T  # polygon edges
+            with np.errstate(divide='ignore', invalid='ignore'):
+                cross = ((y1 > y) != (y2 > y)) & (x < (x2 - x1) * (y - y1) / (y2 - y1) + x1)  # even-odd ray casting
+            seat[cross.sum(1) % 2 == 1] = i
+        return seat
@@ -7,6 +7,7 @@ import math
 import os
 import platform
 import subprocess
+import threading
 import time
 import warnings
 from contextlib import contextmanager
@@ -376,6 +377,59 @@ def smart_resume(ckpt, optimizer, ema=None, weights='yolov5s.pt', epochs=300, re
     return best_fitness, start_epoch, epochs
 
 
+class InputPool:
+    # Reusable model input tensors per image shape. Usage: im = pool(im_uint8_numpy); pred = model(im); pool.release(im)
+    def __init__(self, device, half=False, shapes=8):
+        self.device = device
+        self.dtype = torch.float16 if half else torch.float32
+        self.stage = device.type != 'cpu'  # copy through uint8 staging buffers, pinned on CUDA for async uploads
+        self.shapes = shapes  # maximum image shapes kept, least recently used dropped first
+        self.free = {}  # image shape (c, h, w): list of released (host uint8, device uint8, device float) buffers
+        self.busy = {}  # id(input): (input, buffers) of inputs handed out and not released yet
+        self.lock = threading.Lock()  # inputs may be made and released on different pipeline threads
+
+    def alloc(self, shape):
+        # Return (host uint8, device uint8, device float) buffers for batch shape, host and device uint8 if staging
+        y = torch.empty(shape, dtype=self.dtype, device=self.device)
+        if not self.stage:
+            return None, None, y
+        host = torch.empty(shape, dtype=torch.uint8, pin_memory=self.device.type == 'cuda')
+        return host, torch.empty(shape, dtype=torch.uint8, device=self.device), y
+
+    def __call__(self, im):
+        # Return uint8 numpy im(3,h,w) or (b,3,h,w) as a 0.0 - 1.0 (b,3,h,w) input tensor in released buffers if any.
+        # Buffers are only reused after release(), so inputs still queued or in a forward pass are never overwritten
+        im = im[None] if im.ndim == 3 else im  # expand for batch dim
+        b, shape = im.shape[0], tuple(im.shape[1:])
+        with self.lock:
+            free = self.free.pop(shape, [])  # reinserted as most recently used
+            bufs = free.pop() if free else None
+            if bufs is not None and bufs[2].shape[0] < b:
+                bufs = None  # too small for this batch, dropped for larger ones
+            if len(self.free) >= self.shapes:
+                self.free.pop(next(iter(self.free)))  # drop least recently used shape
+            self.free[shape] = free
+        bufs = bufs or self.alloc(im.shape)
+        host, u8, y = (x[:b] if x is not None else None for x in bufs)
+        x = torch.from_numpy(im)
+        if not self.stage:
+            y.copy_(x).div_(255)  # CPU, in place is faster here than the mixed-dtype kernel below
+        else:
+            host.copy_(x)  # pageable to pinned host memory
+            u8.copy_(host, non_blocking=True)  # upload uint8, 4x less data than float32
+            torch.div(u8, 255, out=y)  # uint8 to fp16/32 and 0 - 255 to 0.0 - 1.0 in one kernel
+        with self.lock:
+            self.busy[id(y)] = y, bufs
+        return y
+
+    def release(self, im):
+        # Return the buffers of input im to the pool once nothing reads its values, repeated or foreign calls are no-ops
+        with self.lock:
+            x = self.busy.pop(id(im), None)
+            if x is not None:
+                self.free.setdefault(tuple(im.shape[1:]), []).append(x[1])
+
+
 class EarlyStopping:
     # YOLOv5 simple early stopper
     def __init__(self, patience=30):
@@ -0,0 +1,87 @@
+# YOLOv5 🚀 by Ultralytics, GPL-3.0 license
+"""
+Temporal card tracker to stabilise detections across frames
+
+Usage:
+    from utils.tracker import CardTracker
+    tracker = CardTracker(nc=len(model.names))
+    for det in pred:
+        det, ids = tracker.update(det)  # confirmed tracks only, det(n,6) = [xyxy, conf, voted cls]
+"""
+
+import numpy as np
+import torch
+from scipy.optimize import linear_sum_assignment
+
+
+def box_iou_np(box1, box2, eps=1e-7):
+    # Return the NxM IoU matrix of numpy boxes box1(N,4) and box2(M,4) in xyxy format
+    (a1, a2), (b1, b2) = np.split(box1[:, None], 2, 2), np.split(box2[None], 2, 2)
+    inter = (np.minimum(a2, b2) - np.maximum(a1, b1)).clip(0).prod(2)
+    area1, area2 = (box1[:, 2:] - box1[:, :2]).prod(1), (box2[:, 2:] - box2[:, :2]).prod(1)
+    return inter / (area1[:, None] + area2 - inter + eps)
+
+
+class CardTracker:
+    # IoU tracker with a ByteTrack-style low-confidence second pass and per-track class voting
+    def __init__(self, nc, iou_thres=0.3, conf_high=0.5, window=10, min_hits=3, max_age=15):
+        self.nc = nc  # number of classes
+        self.iou_thres = iou_thres  # minimum IoU to associate a detection with a track
+        self.conf_high = conf_high  # detections below this only extend existing tracks, they never start one
+        self.decay = 1 - 1 / window  # class vote decay per frame, votes average over ~window frames
+        self.min_hits = min_hits  # matched frames before a track is reported
+        self.max_age = max_age  # unmatched frames before a track is dropped
+        self.reset()
+
+    def reset(self):
+        # Drop all tracks
+        self.boxes = np.zeros((0, 4), dtype=np.float32)  # last matched xyxy box per track
+        self.conf = np.zeros(0, dtype=np.float32)  # last matched confidence per track
+        self.votes = np.zeros((0, self.nc), dtype=np.float32)  # decayed confidence-weighted class votes per track
+        self.ids = np.zeros(0, dtype=np.int64)  # persistent track ids
+        self.hits = np.zeros(0, dtype=np.int32)  # matched frames per track
+        self.age = np.zeros(0, dtype=np.int32)  # frames since last match per track
+        self.next_id = 0
+
+    def update(self, det):
+        # Update tracks with one frame of detections det(n,6) = [xyxy, conf, cls], return confirmed det(m,6) and ids(m)
+        x = det.cpu().float().numpy() if isinstance(det, torch.Tensor) else np.asarray(det, dtype=np.float32)
+        boxes, conf, cls = x[:, :4], x[:, 4], x[:, 5].astype(int)
+        self.age += 1
+        self.votes *= self.decay
+
+        # Associate, high-confidence detections first then low-confidence ones with the remaining tracks
+        high = conf >= self.conf_high
+        tracked, matched = np.zeros(len(self.ids), dtype=bool), np.zeros(len(x), dtype=bool)
+        for stage in high, ~high:
+            t, d = np.flatnonzero(~tracked), np.flatnonzero(stage)
+            if len(t) and len(d):
+                iou = box_iou_np(self.boxes[t], boxes[d])
+                ti, di = linear_sum_assignment(iou, maximize=True)
+                j = iou[ti, di] >= self.iou_thres
+                ti, di = t[ti[j]], d[di[j]]
+                tracked[ti], matched[di] = True, True
+                self.boxes[ti], self.conf[ti], self.age[ti] = boxes[di], conf[di], 0
+                self.hits[ti] += 1
+                self.votes[ti, cls[di]] += conf[di]
+
+        # Start new tracks from unmatched high-confidence detections, drop stale tracks
+        d = np.flatnonzero(high & ~matched)
+        votes = np.zeros((len(d), self.nc), dtype=np.float32)
+        votes[np.arange(len(d)), cls[d]] = conf[d]
+        keep = self.age <= self.max_age
+        self.boxes = np.concatenate((self.boxes[keep], boxes[d]))
+        self.conf = np.concatenate((self.conf[keep], conf[d]))
+        self.votes = np.concatenate((self.votes[keep], votes))
+        self.ids = np.concatenate((self.ids[keep], np.arange(self.next_id, self.next_id + len(d))))
+        self.hits = np.concatenate((self.hits[keep], np.ones(len(d), dtype=np.int32)))
+        self.age = np.concatenate((self.age[keep], np.zeros(len(d), dtype=np.int32)))
+        self.next_id += len(d)
+
+        # Report confirmed tracks seen this frame with their voted class
+        i = (self.age == 0) & (self.hits >= self.min_hits)
+        y = np.concatenate((self.boxes[i], self.conf[i, None], self.votes[i].argmax(1)[:, None]), 1)
+        return (torch.from_numpy(y).to(det) if isinstance(det, torch.Tensor) else y), self.ids[i]
+
+    def __len__(self):
+        return len(self.ids)  # number of live tracks